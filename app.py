@@ -1,37 +1,191 @@
+import io
+import gc
 import os
-from flask import Flask, render_template, request, jsonify, send_from_directory
-from services.pdf_generator import generate_spt_report
+import importlib
+import time
+from flask import Blueprint, Flask, Response, current_app, g, render_template, request, jsonify, send_file, send_from_directory, stream_with_context
+from services.report_cache import payload_key, report_cache
+from services.report_data import prepare_report_data
+from services.pile_capacity import parse_pile_options, pile_capacity
+from services.report_repository import get_report_repository
+from services.preview import PREVIEW_TEMPLATE, preview_sections, render_changed_sections, warm_templates
+from services.metrics import DURATION_BUCKETS, SIZE_BUCKETS, metrics, server_timing_header
+from services.pdf_store import DEFAULT_MAX_AGE, DEFAULT_MAX_BYTES, get_pdf_store
 
-app = Flask(__name__)
+# The PDF engine (ReportLab and every service built on it) is imported by
+# the routes that render, so a worker that only serves the form and the
+# preview never loads it. SPT_WARMUP=1 loads it in create_app instead.
 
-# Ensure the pdfs directory exists
-@app.before_request
-def setup():
-    pdf_dir = os.path.join(app.root_path, 'static', 'pdfs')
-    if not os.path.exists(pdf_dir):
-        os.makedirs(pdf_dir)
+# Sondagem rendered by the warmup, small but touching every drawing path
+WARMUP_PAYLOAD = {
+    'formData': {'laudo_numero': 'WARMUP', 'metros_por_folha': '2', 'capacidade_estacas': '1'},
+    'soilLayers': [
+        {'start_depth': '0', 'end_depth': '2', 'description': 'Argila siltosa, mole, marrom'},
+        {'start_depth': '2', 'end_depth': '4', 'description': 'Areia fina, compacta, cinza'},
+    ],
+    'sptData': [
+        {'depth': str(d), 'golpes_inicial': str(d), 'golpes_final': str(2 * d), 'has_water_level': d == 2}
+        for d in range(1, 5)
+    ],
+}
 
-@app.route('/')
+# Services that import the PDF engine, loaded by the warmup so their
+# bytecode is shared with the forked workers too
+WARMUP_MODULES = (
+    'services.batch_generator',
+    'services.caderno',
+    'services.cross_section_pdf',
+    'services.pdf_jobs',
+    'services.thumbnails',
+)
+
+views = Blueprint('views', __name__)
+
+def create_app(config=None):
+    app = Flask(__name__)
+    
+    # Instrumentation is off unless asked for; disabled it costs one attribute check per stage
+    app.config['SPT_METRICS'] = os.environ.get('SPT_METRICS', '') == '1'
+    app.config['SPT_SERVER_TIMING'] = os.environ.get('SPT_SERVER_TIMING', '') == '1'
+    
+    # Generated PDFs are capped by total size and age; the sweeper evicts the
+    # least recently used files
+    app.config['PDF_STORE_MAX_BYTES'] = int(os.environ.get('SPT_PDF_STORE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    app.config['PDF_STORE_MAX_AGE'] = int(os.environ.get('SPT_PDF_STORE_MAX_AGE', DEFAULT_MAX_AGE))
+    
+    # Saved laudos (SQLite, WAL, one connection per thread)
+    app.config['REPORTS_DB'] = os.environ.get('SPT_REPORTS_DB', os.path.join(app.root_path, 'data', 'reports.sqlite3'))
+    
+    # Render a report before serving (and before gunicorn --preload forks)
+    app.config['SPT_WARMUP'] = os.environ.get('SPT_WARMUP', '') == '1'
+    
+    if config:
+        app.config.update(config)
+    
+    # The pdfs directory is created here, once; the sweeper thread is started
+    # by the first request of each process (see start_sweeper)
+    app.extensions['pdf_store'] = get_pdf_store(app.root_path,
+                                                max_bytes=app.config['PDF_STORE_MAX_BYTES'],
+                                                max_age=app.config['PDF_STORE_MAX_AGE'])
+    app.extensions['reports'] = get_report_repository(app.config['REPORTS_DB'])
+    
+    # Compiled preview templates stay in the Jinja cache from the first request on
+    warm_templates(app)
+    
+    app.register_blueprint(views)
+    
+    # Before metrics are enabled, so the dummy report is not counted
+    if app.config['SPT_WARMUP']:
+        warm_up(app)
+    
+    metrics.enabled = app.config['SPT_METRICS'] or app.config['SPT_SERVER_TIMING']
+    return app
+
+def warm_up(app):
+    # Import the PDF engine, decode the logo and fill the frame, text and
+    # font-metric caches by rendering a throwaway report in every output
+    # profile. Run in the gunicorn master (--preload), all of
+    # it is then shared copy-on-write by the forked workers; freezing the
+    # collected objects keeps the GC from touching (and copying) those pages.
+    from services.pdf_generator import render_spt_report
+    from services.output_profiles import OUTPUT_PROFILES
+    from services.resources import resources
+    for name in WARMUP_MODULES:
+        importlib.import_module(name)
+    
+    resources.load(app.root_path)
+    for output in OUTPUT_PROFILES:
+        payload = dict(WARMUP_PAYLOAD, formData=dict(WARMUP_PAYLOAD['formData'], perfil_saida=output))
+        form_data, profile = prepare_report_data(payload)
+        render_spt_report(form_data, profile, root_path=app.root_path)
+    
+    gc.collect()
+    gc.freeze()
+
+def pdf_store():
+    return current_app.extensions['pdf_store']
+
+def reports():
+    return current_app.extensions['reports']
+
+@views.before_app_request
+def start_sweeper():
+    # No-op after the first request of the process
+    pdf_store().start_sweeper()
+
+@views.before_app_request
+def start_timing():
+    if metrics.enabled:
+        g.metrics_token = metrics.start_request()
+        g.request_start = time.perf_counter()
+
+@views.after_app_request
+def record_timing(response):
+    token = g.pop('metrics_token', None)
+    if token is None:
+        return response
+    elapsed = time.perf_counter() - g.pop('request_start')
+    timings = metrics.finish_request(token)
+    # Labels keep the plain view name, without the blueprint prefix
+    endpoint = request.endpoint.rpartition('.')[2] if request.endpoint else 'unknown'
+    
+    metrics.inc('spt_http_requests_total', (('endpoint', endpoint), ('method', request.method), ('status', str(response.status_code))))
+    metrics.observe('spt_http_request_duration_seconds', elapsed, (('endpoint', endpoint),), DURATION_BUCKETS)
+    metrics.observe('spt_http_request_size_bytes', request.content_length or 0, (('endpoint', endpoint),), SIZE_BUCKETS)
+    # Streamed responses have no length up front and are left out
+    if response.content_length is not None:
+        metrics.observe('spt_http_response_size_bytes', response.content_length, (('endpoint', endpoint),), SIZE_BUCKETS)
+    
+    if current_app.config['SPT_SERVER_TIMING']:
+        timings.append(('total', elapsed))
+        response.headers['Server-Timing'] = server_timing_header(timings)
+    return response
+
+def read_report_payload():
+    # Parse and validate the JSON body, timing both steps
+    with metrics.stage('parse_json'):
+        data = request.json
+    with metrics.stage('prepare'):
+        return prepare_report_data(data)
+
+@views.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/api/preview', methods=['POST'])
+@views.route('/api/preview', methods=['POST'])
 def preview():
+    # Without "sectionHashes" the full preview is returned; with them only the
+    # sections whose content hash changed, or 304 if none did
     try:
         data = request.json
         form_data = data.get('formData', {})
         soil_layers = data.get('soilLayers', [])
         spt_data = data.get('sptData', [])
+        known_hashes = data.get('sectionHashes')
+        
+        sections = preview_sections(form_data, soil_layers, spt_data)
+        hashes = {name: digest for name, _, _, digest in sections}
+        
+        if isinstance(known_hashes, dict):
+            changed = render_changed_sections(sections, known_hashes)
+            if not changed:
+                return Response(status=304)
+            return jsonify({
+                'success': True,
+                'sections': changed,
+                'hashes': hashes
+            })
         
         # Render the preview template with the data
-        preview_html = render_template('components/preview.html', 
+        preview_html = render_template(PREVIEW_TEMPLATE, 
                                       form_data=form_data,
                                       soil_layers=soil_layers,
                                       spt_data=spt_data)
         
         return jsonify({
             'success': True,
-            'html': preview_html
+            'html': preview_html,
+            'hashes': hashes
         })
     except Exception as e:
         return jsonify({
@@ -39,51 +193,117 @@ def preview():
             'error': str(e)
         })
 
-@app.route('/api/generate-pdf', methods=['POST'])
+@views.route('/api/generate-pdf', methods=['POST'])
 def generate_pdf():
+    from services.pdf_generator import generate_spt_report
     try:
-        data = request.json
-        form_data = data.get('formData', {})
-        soil_layers = data.get('soilLayers', [])
-        spt_data = data.get('sptData', [])
-        
-        # Pre-process data to handle empty strings
-        for i, layer in enumerate(soil_layers):
-            layer['start_depth'] = float(layer.get('start_depth', 0) or 0)
-            layer['end_depth'] = float(layer.get('end_depth', 0) or 0)
-            layer['description'] = layer.get('description', '') or ''
-            
-            # Ensure start_depth of current layer matches end_depth of previous layer
-            if i > 0:
-                prev_end_depth = float(soil_layers[i-1].get('end_depth', 0) or 0)
-                layer['start_depth'] = prev_end_depth
-        
-        for i, data_point in enumerate(spt_data):
-            # Use soil layer end depth if available
-            if i < len(soil_layers):
-                data_point['depth'] = float(soil_layers[i].get('end_depth', 0) or 0)
-            else:
-                data_point['depth'] = float(data_point.get('depth', 0) or 0)
-            
-            # Set amostra to index+1 if not provided
-            if not data_point.get('amostra'):
-                data_point['amostra'] = str(i + 1)
-                
-            data_point['golpes_inicial'] = int(data_point.get('golpes_inicial', 0) or 0)
-            data_point['golpes_final'] = int(data_point.get('golpes_final', 0) or 0)
-            data_point['has_water_level'] = bool(data_point.get('has_water_level', False))
-        
-        # Sort data by depth for proper rendering
-        soil_layers.sort(key=lambda x: x['start_depth'])
-        spt_data.sort(key=lambda x: x['depth'])
+        form_data, profile = read_report_payload()
         
         # Generate the PDF
-        pdf_filename = generate_spt_report(form_data, soil_layers, spt_data)
+        pdf_filename = generate_spt_report(form_data, profile)
         
         return jsonify({
             'success': True,
             'pdfPath': pdf_filename
         })
+    except ValueError as e:
+        # Invalid input is reported back before anything is rendered
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        import traceback
+        print(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@views.route('/api/render-pdf', methods=['POST'])
+def render_pdf():
+    # Render into memory and stream the PDF back in the same response;
+    # identical payloads are served from the in-process cache
+    from services.pdf_generator import render_spt_report, report_filename
+    try:
+        form_data, profile = read_report_payload()
+        
+        key = payload_key(form_data, profile)
+        cached = report_cache.get(key)
+        if cached is None:
+            filename = report_filename(form_data)
+            pdf_bytes = render_spt_report(form_data, profile)
+            report_cache.put(key, filename, pdf_bytes)
+        else:
+            filename, pdf_bytes = cached
+        
+        response = send_file(io.BytesIO(pdf_bytes), mimetype='application/pdf', download_name=filename)
+        response.headers['X-Cache'] = 'HIT' if cached else 'MISS'
+        response.set_etag(key)
+        return response
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        import traceback
+        print(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@views.route('/api/thumbnail', methods=['POST'])
+def thumbnail():
+    # PNG/SVG of one sheet of the real PDF layout: ?format=png|svg&dpi=72&page=1
+    from services.thumbnails import DEFAULT_DPI, ThumbnailUnavailable, render_thumbnail
+    try:
+        output = request.args.get('format', 'png')
+        dpi = int(request.args.get('dpi', DEFAULT_DPI))
+        page_number = int(request.args.get('page', 1))
+        form_data, profile = read_report_payload()
+        image, mimetype, key, hit = render_thumbnail(form_data, profile, page_number, output, dpi)
+    except ThumbnailUnavailable as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 501
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        import traceback
+        print(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    response = Response(image, mimetype=mimetype)
+    response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+    response.set_etag(key)
+    return response
+
+@views.route('/api/pdf-jobs', methods=['POST'])
+def submit_pdf_job():
+    # Queue the report and answer right away; the client polls the status URL
+    from services.pdf_jobs import JobQueueFull, job_status, pdf_jobs
+    try:
+        form_data, profile = read_report_payload()
+        job = pdf_jobs.submit(current_app.root_path, form_data, profile)
+    except JobQueueFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         import traceback
         print(traceback.format_exc())
@@ -91,11 +311,300 @@ def generate_pdf():
             'success': False,
             'error': str(e)
         }), 500
+    
+    status = job_status(job)
+    status.update({
+        'success': True,
+        'statusUrl': f"/api/pdf-jobs/{job['id']}",
+        'resultUrl': f"/api/pdf-jobs/{job['id']}/result"
+    })
+    return jsonify(status), 202
+
+@views.route('/api/pdf-jobs/<job_id>')
+def pdf_job_status(job_id):
+    from services.pdf_jobs import job_status, pdf_jobs
+    job = pdf_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job não encontrado'
+        }), 404
+    
+    status = job_status(job)
+    status['success'] = job['status'] != 'failed'
+    return jsonify(status)
+
+@views.route('/api/pdf-jobs/<job_id>/result')
+def pdf_job_result(job_id):
+    from services.pdf_jobs import job_status, pdf_jobs
+    job = pdf_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job não encontrado'
+        }), 404
+    if job['status'] == 'failed':
+        return jsonify({
+            'success': False,
+            'error': job['error']
+        }), 500
+    if job['status'] != 'done':
+        # Not ready yet, keep polling
+        return jsonify(dict(job_status(job), success=True)), 202
+    
+    return send_file(io.BytesIO(job['pdf']), mimetype='application/pdf', download_name=job['filename'])
+
+@views.route('/api/generate-pdf/batch', methods=['POST'])
+def generate_pdf_batch():
+    from services.batch_generator import check_batch, generate_batch, stream_batch_zip
+    try:
+        data = request.json or {}
+        boreholes = data.get('boreholes', [])
+        output = data.get('format', 'manifest')
+        check_batch(boreholes)
+        
+        if output == 'zip':
+            # Stream the archive while the remaining reports are still rendering
+            return Response(
+                stream_with_context(stream_batch_zip(current_app.root_path, boreholes)),
+                mimetype='application/zip',
+                headers={'Content-Disposition': 'attachment; filename=Laudos_SPT.zip'}
+            )
+        
+        results = generate_batch(current_app.root_path, boreholes)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        import traceback
+        print(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    return jsonify({
+        'success': all(r['success'] for r in results),
+        'files': results
+    })
+
+@views.route('/api/cross-section', methods=['POST'])
+def cross_section_pdf():
+    # Longitudinal profile of several boreholes on one page, returned inline
+    from services.cross_section import prepare_cross_section
+    from services.cross_section_pdf import cross_section_filename, render_cross_section
+    try:
+        with metrics.stage('parse_json'):
+            data = request.json or {}
+        with metrics.stage('prepare'):
+            form_data, sections = prepare_cross_section(data)
+        pdf_bytes = render_cross_section(form_data, sections)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        import traceback
+        print(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    return send_file(io.BytesIO(pdf_bytes), mimetype='application/pdf',
+                     download_name=cross_section_filename(form_data))
+
+@views.route('/api/caderno', methods=['POST'])
+def caderno_pdf():
+    # Every borehole of an obra in one PDF with an index, returned inline:
+    # {"formData": {...}, "boreholes": [{"formData", "soilLayers", "sptData"}, ...]}
+    from services.caderno import caderno_filename, prepare_caderno, render_caderno
+    try:
+        with metrics.stage('parse_json'):
+            data = request.json or {}
+        with metrics.stage('prepare'):
+            form_data, boreholes, rows = prepare_caderno(data)
+        pdf_bytes = render_caderno(form_data, boreholes, rows)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        import traceback
+        print(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    return send_file(io.BytesIO(pdf_bytes), mimetype='application/pdf',
+                     download_name=caderno_filename(form_data))
+
+@views.route('/api/pile-capacity', methods=['POST'])
+def pile_capacity_grid():
+    # Aoki-Velloso / Décourt-Quaresma loads for a grid of pile types,
+    # diameters and tip depths; "piles" holds the grid, all optional
+    try:
+        form_data, profile = read_report_payload()
+        options = parse_pile_options(request.json.get('piles') or {})
+        with metrics.stage('pile_capacity'):
+            rows = pile_capacity(profile, options)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        import traceback
+        print(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'count': len(rows),
+        'results': rows
+    })
+
+@views.route('/api/import', methods=['POST'])
+def import_spreadsheet():
+    # Multipart upload of a CSV/XLSX logbook; rows are streamed from the
+    # uploaded file, grouped by furo and rendered in batches
+    from services.batch_generator import MAX_BATCH_SIZE
+    from services.bulk_import import DEFAULT_BATCH_SIZE, import_boreholes
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({
+            'success': False,
+            'error': 'Nenhum arquivo enviado'
+        }), 400
+    
+    dry_run = request.form.get('dry_run') in ('1', 'true')
+    try:
+        batch_size = max(1, min(MAX_BATCH_SIZE, int(request.form.get('batch_size', DEFAULT_BATCH_SIZE))))
+        results = list(import_boreholes(current_app.root_path, upload.stream, upload.filename, batch_size, dry_run))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    return jsonify({
+        'success': all(r['success'] for r in results),
+        'boreholes': len(results),
+        'files': results
+    })
+
+@views.route('/api/reports', methods=['POST'])
+def save_report():
+    # Store the validated payload; saving the same laudo twice keeps one row
+    try:
+        form_data, profile = read_report_payload()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    soil_layers, spt_data = profile.to_payload()
+    payload = {'formData': form_data, 'soilLayers': soil_layers, 'sptData': spt_data}
+    with metrics.stage('db'):
+        report_id, created = reports().save(form_data, payload, payload_key(form_data, profile))
+    return jsonify({
+        'success': True,
+        'id': report_id
+    }), 201 if created else 200
+
+@views.route('/api/reports')
+def list_reports():
+    # Paginated search: ?q=&laudo_numero=&obra=&cliente=&date_from=&date_to=&page=&per_page=
+    args = request.args
+    try:
+        page = int(args.get('page', 1))
+        per_page = int(args.get('per_page', 20))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Paginação inválida'
+        }), 400
+    
+    with metrics.stage('db'):
+        items, total = reports().search(
+            q=args.get('q'), laudo_numero=args.get('laudo_numero'), obra=args.get('obra'),
+            cliente=args.get('cliente'), date_from=args.get('date_from'), date_to=args.get('date_to'),
+            page=page, per_page=per_page)
+    return jsonify({
+        'success': True,
+        'total': total,
+        'page': max(1, page),
+        'reports': items
+    })
+
+@views.route('/api/reports/<int:report_id>', methods=['GET', 'DELETE'])
+def report_detail(report_id):
+    if request.method == 'DELETE':
+        with metrics.stage('db'):
+            deleted = reports().delete(report_id)
+        if not deleted:
+            return jsonify({
+                'success': False,
+                'error': 'Laudo não encontrado'
+            }), 404
+        return jsonify({'success': True})
+    
+    with metrics.stage('db'):
+        report = reports().get(report_id)
+    if report is None:
+        return jsonify({
+            'success': False,
+            'error': 'Laudo não encontrado'
+        }), 404
+    return jsonify(dict(report, success=True))
+
+@views.route('/api/reports/<int:report_id>/pdf')
+def report_pdf(report_id):
+    # Regenerate a saved laudo (served from the PDF cache when unchanged)
+    from services.pdf_generator import render_spt_report, report_filename
+    with metrics.stage('db'):
+        report = reports().get(report_id)
+    if report is None:
+        return jsonify({
+            'success': False,
+            'error': 'Laudo não encontrado'
+        }), 404
+    
+    form_data, profile = prepare_report_data(report['payload'])
+    key = payload_key(form_data, profile)
+    cached = report_cache.get(key)
+    if cached is None:
+        filename = report_filename(form_data)
+        pdf_bytes = render_spt_report(form_data, profile)
+        report_cache.put(key, filename, pdf_bytes)
+    else:
+        filename, pdf_bytes = cached
+    return send_file(io.BytesIO(pdf_bytes), mimetype='application/pdf', download_name=filename)
+
+@views.route('/metrics')
+def metrics_endpoint():
+    # Prometheus scrape target, only exposed when SPT_METRICS=1
+    if not current_app.config['SPT_METRICS']:
+        return jsonify({
+            'success': False,
+            'error': 'Métricas desativadas'
+        }), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
-@app.route('/download-pdf/<path:filename>')
+@views.route('/download-pdf/<path:filename>')
 def download_pdf(filename):
-    pdf_dir = os.path.join(app.root_path, 'static', 'pdfs')
-    return send_from_directory(pdf_dir, filename)
+    # A download counts as a use for the LRU sweeper
+    pdf_store().touch(filename)
+    return send_from_directory(pdf_store().directory, filename)
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
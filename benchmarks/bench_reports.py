@@ -0,0 +1,223 @@
+# Benchmark of SPT report generation: time, peak memory (tracemalloc) and
+# PDF size of each stage and output profile for synthetic boreholes of
+# several sizes, saved as JSON:
+#
+#     python -m benchmarks.bench_reports --output bench.json
+#     python -m benchmarks.bench_reports --compare bench.json
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import tracemalloc
+from datetime import datetime
+
+import reportlab
+from reportlab.lib.pagesizes import A4
+
+from app import create_app
+from services.report_data import prepare_report_data
+from services.report_layout import ReportLayout
+from services.pdf_generator import render_spt_report
+
+SAMPLE_COUNTS = (10, 50, 200, 1000)
+
+# Output profiles measured besides the default (archive) render
+OUTPUT_CASES = (
+    ('render_mobile', 'mobile', False),
+    ('render_mobile_gray', 'mobile', True),
+)
+
+SHORT_DESCRIPTIONS = (
+    "Argila siltosa, mole, marrom",
+    "Areia fina, fofa, cinza",
+    "Silte arenoso, rijo, variegado",
+    "Areia média argilosa, compacta, amarela",
+)
+
+LONG_DESCRIPTION_WORDS = (
+    "argila", "silte", "areia", "fina", "média", "grossa", "pouco", "muito",
+    "arenosa", "siltosa", "argilosa", "com", "pedregulhos", "mole", "média",
+    "rija", "dura", "fofa", "compacta", "marrom", "cinza", "amarela", "vermelha",
+    "variegada", "com", "raízes", "e", "matéria", "orgânica",
+)
+
+def synthetic_payload(samples, long_descriptions=False, seed=0, metres_per_page=None):
+    # Borehole with one layer and one SPT sample per metre
+    rng = random.Random(seed)
+    soil_layers = []
+    spt_data = []
+    for i in range(samples):
+        if long_descriptions:
+            description = " ".join(rng.choice(LONG_DESCRIPTION_WORDS) for _ in range(30)).capitalize()
+        else:
+            description = rng.choice(SHORT_DESCRIPTIONS)
+        soil_layers.append({
+            'start_depth': str(i),
+            'end_depth': str(i + 1),
+            'description': description,
+        })
+        golpes = min(50, i // 2 + rng.randint(0, 8))
+        spt_data.append({
+            'depth': str(i + 1),
+            'cota': '',
+            'amostra': '',
+            'golpes_inicial': str(max(0, golpes - rng.randint(0, 5))),
+            'golpes_final': str(golpes),
+            'has_water_level': i == samples // 3,
+        })
+    form_data = {
+        'laudo_numero': f"BENCH-{samples}-{'longo' if long_descriptions else 'curto'}",
+        'spt_numero': '1',
+        'obra': 'Benchmark',
+        'cliente': 'Benchmark',
+        'empresa': 'Empresa de Sondagens',
+        'endereco_empresa': 'Rua das Sondagens, 100',
+        'responsavel_tecnico': 'Eng. Responsável',
+        'crea': '000000/D',
+    }
+    if metres_per_page:
+        form_data['metros_por_folha'] = str(metres_per_page)
+    return {'formData': form_data, 'soilLayers': soil_layers, 'sptData': spt_data}
+
+def copy_payload(payload):
+    # prepare_report_data normalizes in place, every run needs a fresh copy
+    return json.loads(json.dumps(payload))
+
+def measure(func, repeat):
+    # Best and median wall time over `repeat` runs, peak memory of one extra run
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {
+        'best_ms': round(min(times) * 1000, 3),
+        'median_ms': round(statistics.median(times) * 1000, 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+def bench_case(client, samples, long_descriptions, repeat):
+    payload = synthetic_payload(samples, long_descriptions)
+    paginated_payload = synthetic_payload(samples, long_descriptions, metres_per_page=10)
+    width, height = A4
+    root_path = client.application.root_path
+    stages = {}
+
+    def prepare():
+        return prepare_report_data(copy_payload(payload))
+    (form_data, profile), stages['prepare'] = measure(prepare, repeat)
+
+    def layout():
+        report_layout = ReportLayout(width, height, form_data, profile)
+        return list(report_layout.pages())
+    _, stages['layout'] = measure(layout, repeat)
+
+    def render():
+        return render_spt_report(dict(form_data), profile, root_path=root_path)
+    pdf_bytes, stages['render'] = measure(render, repeat)
+    stages['render']['pdf_bytes'] = len(pdf_bytes)
+
+    # Size and time of each output profile
+    for stage, output, grayscale in OUTPUT_CASES:
+        output_form = dict(form_data, perfil_saida=output, escala_cinza=grayscale)
+        def render_output():
+            return render_spt_report(dict(output_form), profile, root_path=root_path)
+        pdf_bytes, stages[stage] = measure(render_output, repeat)
+        stages[stage]['pdf_bytes'] = len(pdf_bytes)
+
+    paginated_form, paginated_profile = prepare_report_data(copy_payload(paginated_payload))
+    def render_paginated():
+        return render_spt_report(dict(paginated_form), paginated_profile, root_path=root_path)
+    pdf_bytes, stages['render_paginated'] = measure(render_paginated, repeat)
+    stages['render_paginated']['pdf_bytes'] = len(pdf_bytes)
+
+    filename = None
+    def route_generate_pdf():
+        nonlocal filename
+        response = client.post('/api/generate-pdf', json=copy_payload(payload))
+        filename = response.get_json()['pdfPath']
+        return response
+    _, stages['route_generate_pdf'] = measure(route_generate_pdf, repeat)
+    pdf_path = os.path.join(root_path, 'static', 'pdfs', filename)
+    stages['route_generate_pdf']['pdf_bytes'] = os.path.getsize(pdf_path)
+    os.remove(pdf_path)
+
+    def route_preview():
+        return client.post('/api/preview', json=copy_payload(payload))
+    response, stages['route_preview'] = measure(route_preview, repeat)
+    stages['route_preview']['response_bytes'] = len(response.data)
+
+    return {
+        'samples': samples,
+        'descriptions': 'longas' if long_descriptions else 'curtas',
+        'stages': stages,
+    }
+
+def run(sample_counts, repeat):
+    client = create_app().test_client()
+    cases = []
+    for samples in sample_counts:
+        for long_descriptions in (False, True):
+            case = bench_case(client, samples, long_descriptions, repeat)
+            cases.append(case)
+            print_case(case)
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'reportlab': reportlab.Version,
+        'repeat': repeat,
+        'cases': cases,
+    }
+
+def print_case(case, baseline=None):
+    print(f"\n{case['samples']} amostras, descrições {case['descriptions']}")
+    for stage, values in case['stages'].items():
+        line = f"  {stage:<20} {values['median_ms']:>10.2f} ms  {values['peak_kib']:>10.1f} KiB"
+        size = values.get('pdf_bytes', values.get('response_bytes'))
+        if size is not None:
+            line += f"  {size:>10} B"
+        if baseline and stage in baseline:
+            before = baseline[stage]['median_ms']
+            if before:
+                line += f"  ({(values['median_ms'] - before) / before * 100:+.1f}% tempo)"
+        print(line)
+
+def compare(results, baseline_path):
+    # Print the current run next to a previous JSON result
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(c['samples'], c['descriptions']): c['stages'] for c in baseline['cases']}
+    print(f"\nComparação com {baseline_path} ({baseline['created']})")
+    for case in results['cases']:
+        print_case(case, previous.get((case['samples'], case['descriptions'])))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de geração de laudos SPT.')
+    parser.add_argument('--samples', type=int, nargs='+', default=list(SAMPLE_COUNTS),
+                        help='tamanhos de sondagem (número de amostras)')
+    parser.add_argument('--repeat', type=int, default=5, help='repetições por etapa')
+    parser.add_argument('--output', help='arquivo JSON para salvar os resultados')
+    parser.add_argument('--compare', help='JSON de uma execução anterior para comparar')
+    args = parser.parse_args(argv)
+
+    results = run(args.samples, args.repeat)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados salvos em {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    sys.exit(main())
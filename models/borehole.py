@@ -0,0 +1,185 @@
+import math
+from array import array
+from models.soil_layer import SoilLayer
+from models.spt_data import SPTData
+
+# Largest value an array('i') column holds
+MAX_INT = 2 ** 31 - 1
+
+def parse_float(value, label, field):
+    # Empty fields count as zero, like the form has always done
+    if value is None or value == '':
+        return 0.0
+    # Accept the Brazilian decimal comma ("1,5") as well
+    if isinstance(value, str):
+        value = value.strip().replace(',', '.')
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{label}: valor inválido para {field} ({value!r})")
+    if math.isnan(number) or math.isinf(number):
+        raise ValueError(f"{label}: valor inválido para {field} ({value!r})")
+    if number < 0:
+        raise ValueError(f"{label}: valor negativo para {field} ({value!r})")
+    return number
+
+def parse_int(value, label, field):
+    number = parse_float(value, label, field)
+    if number != int(number):
+        raise ValueError(f"{label}: {field} deve ser um número inteiro ({value!r})")
+    # Counts are stored in array('i') columns
+    if number > MAX_INT:
+        raise ValueError(f"{label}: valor muito grande para {field} ({value!r})")
+    return int(number)
+
+class BoreholeProfile:
+    # Validated, column-oriented borehole: one array per attribute instead of
+    # a dict per row. Built once per request and shared by all drawing code.
+    # Layers are chained (each starts where the previous one ends), so both
+    # their start and end depths are sorted; samples are sorted by depth.
+    __slots__ = (
+        'layer_starts', 'layer_ends', 'descriptions',
+        'depths', 'cotas', 'amostras', 'golpes_inicial', 'golpes_final', 'water_flags',
+    )
+
+    def __init__(self):
+        self.layer_starts = array('d')
+        self.layer_ends = array('d')
+        self.descriptions = []
+        self.depths = array('d')
+        self.cotas = []
+        self.amostras = []
+        self.golpes_inicial = array('i')
+        self.golpes_final = array('i')
+        self.water_flags = array('b')
+
+    @classmethod
+    def from_payload(cls, soil_layers, spt_data):
+        # Normalize the soilLayers/sptData lists sent by the form, raising
+        # ValueError with the offending row on bad input
+        layers = []
+        for i, layer in enumerate(soil_layers):
+            label = f"Camada {i + 1}"
+            start_depth = parse_float(layer.get('start_depth'), label, 'profundidade inicial')
+            end_depth = parse_float(layer.get('end_depth'), label, 'profundidade final')
+
+            # Ensure start_depth of current layer matches end_depth of previous layer
+            if layers:
+                start_depth = layers[-1][1]
+            if end_depth < start_depth:
+                raise ValueError(f"{label}: profundidade final ({end_depth}) menor que a inicial ({start_depth})")
+            layers.append((start_depth, end_depth, str(layer.get('description', '') or '')))
+
+        samples = []
+        for i, data_point in enumerate(spt_data):
+            label = f"Amostra {i + 1}"
+            # A sample keeps its own depth; without one it takes the end
+            # depth of the layer at the same position, as the form does
+            depth = data_point.get('depth')
+            if depth in (None, '') and i < len(layers):
+                depth = layers[i][1]
+            else:
+                depth = parse_float(depth, label, 'profundidade')
+
+            cota = data_point.get('cota')
+            cota = parse_float(cota, label, 'cota') if cota not in (None, '') else None
+
+            # Set amostra to index+1 if not provided
+            amostra = str(data_point.get('amostra') or i + 1)
+
+            samples.append((
+                depth,
+                cota,
+                amostra,
+                parse_int(data_point.get('golpes_inicial'), label, 'golpes inicial'),
+                parse_int(data_point.get('golpes_final'), label, 'golpes final'),
+                bool(data_point.get('has_water_level', False)),
+            ))
+
+        # Sort data by depth for proper rendering
+        layers.sort(key=lambda x: x[0])
+        samples.sort(key=lambda x: x[0])
+
+        profile = cls()
+        for start_depth, end_depth, description in layers:
+            profile.layer_starts.append(start_depth)
+            profile.layer_ends.append(end_depth)
+            profile.descriptions.append(description)
+        for depth, cota, amostra, inicial, final, water in samples:
+            profile.depths.append(depth)
+            profile.cotas.append(cota)
+            profile.amostras.append(amostra)
+            profile.golpes_inicial.append(inicial)
+            profile.golpes_final.append(final)
+            profile.water_flags.append(water)
+        return profile
+
+    @property
+    def layer_count(self):
+        return len(self.layer_ends)
+
+    @property
+    def sample_count(self):
+        return len(self.depths)
+
+    @property
+    def max_layer_depth(self):
+        return max(self.layer_ends, default=0.0)
+
+    @property
+    def max_sample_depth(self):
+        return max(self.depths, default=0.0)
+
+    @property
+    def water_level_depth(self):
+        # Depth of the first sample flagged with water, or None
+        for depth, water in zip(self.depths, self.water_flags):
+            if water:
+                return depth
+        return None
+
+    def slice(self, layers, samples):
+        # New profile holding only the given layer and sample index ranges
+        profile = BoreholeProfile()
+        profile.layer_starts = self.layer_starts[layers]
+        profile.layer_ends = self.layer_ends[layers]
+        profile.descriptions = self.descriptions[layers]
+        profile.depths = self.depths[samples]
+        profile.cotas = self.cotas[samples]
+        profile.amostras = self.amostras[samples]
+        profile.golpes_inicial = self.golpes_inicial[samples]
+        profile.golpes_final = self.golpes_final[samples]
+        profile.water_flags = self.water_flags[samples]
+        return profile
+
+    def layers(self):
+        for start_depth, end_depth, description in zip(self.layer_starts, self.layer_ends, self.descriptions):
+            yield SoilLayer(start_depth, end_depth, description)
+
+    def samples(self):
+        for row in zip(self.depths, self.cotas, self.amostras, self.golpes_inicial, self.golpes_final, self.water_flags):
+            depth, cota, amostra, inicial, final, water = row
+            yield SPTData(depth, cota, amostra, inicial, final, bool(water))
+
+    def to_payload(self):
+        # Plain lists in the shape of the request payload (used for hashing and JSON)
+        soil_layers = [
+            {'start_depth': start_depth, 'end_depth': end_depth, 'description': description}
+            for start_depth, end_depth, description in zip(self.layer_starts, self.layer_ends, self.descriptions)
+        ]
+        spt_data = [
+            {
+                'depth': depth,
+                'cota': cota,
+                'amostra': amostra,
+                'golpes_inicial': inicial,
+                'golpes_final': final,
+                'has_water_level': bool(water),
+            }
+            for depth, cota, amostra, inicial, final, water in zip(
+                self.depths, self.cotas, self.amostras, self.golpes_inicial, self.golpes_final, self.water_flags)
+        ]
+        return soil_layers, spt_data
+
+    def __repr__(self):
+        return f"BoreholeProfile(layers={self.layer_count}, samples={self.sample_count}, max_depth={self.max_layer_depth})"
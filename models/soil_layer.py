@@ -1,4 +1,6 @@
 class SoilLayer:
+    __slots__ = ('start_depth', 'end_depth', 'description')
+    
     def __init__(self, start_depth=0, end_depth=0, description=""):
         self.start_depth = float(start_depth)
         self.end_depth = float(end_depth)
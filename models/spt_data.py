@@ -1,4 +1,6 @@
 class SPTData:
+    __slots__ = ('depth', 'cota', 'amostra', 'golpes_inicial', 'golpes_final', 'has_water_level')
+    
     def __init__(self, depth=0, cota=None, amostra=None, golpes_inicial=0, golpes_final=0, has_water_level=False):
         self.depth = float(depth)
         self.cota = float(cota) if cota is not None else None
@@ -0,0 +1,110 @@
+import os
+import re
+import json
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from services.report_data import prepare_report_data
+from services.pdf_generator import generate_spt_report
+from services.pdf_store import get_pdf_store
+
+# Upper bound on boreholes accepted in a single batch request
+MAX_BATCH_SIZE = 500
+
+# Process pool shared by all batch requests, created on first use
+_executor = None
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _executor
+
+def batch_filename(form_data, index):
+    # Boreholes of the same obra usually share the laudo number, so the SPT
+    # number (or the position in the batch) is added to keep files apart
+    laudo = form_data.get('laudo_numero') or 'lote'
+    spt = form_data.get('spt_numero') or str(index + 1)
+    name = f"Laudo_SPT_{laudo}_SPT{spt}"
+    return re.sub(r'[^\w.-]+', '_', name) + '.pdf'
+
+def check_batch(boreholes):
+    # Shape of the request only: each borehole is validated by its own worker
+    # and a bad one fails alone in the manifest. Raises ValueError.
+    if not boreholes:
+        raise ValueError("Nenhuma sondagem informada")
+    if not isinstance(boreholes, list):
+        raise ValueError("O lote deve ser uma lista de sondagens")
+    if len(boreholes) > MAX_BATCH_SIZE:
+        raise ValueError(f"O lote aceita no máximo {MAX_BATCH_SIZE} sondagens")
+    for i, data in enumerate(boreholes):
+        if not isinstance(data, dict) or not isinstance(data.get('formData') or {}, dict):
+            raise ValueError(f"Sondagem {i + 1}: formato inválido")
+
+def batch_filenames(boreholes):
+    # Names are assigned before fan-out so two workers never write the same
+    # file; a repeated laudo/SPT pair gets the batch position appended
+    filenames = []
+    seen = set()
+    for i, data in enumerate(boreholes):
+        filename = batch_filename(data.get('formData', {}) or {}, i)
+        if filename in seen:
+            filename = filename[:-len('.pdf')] + f"_{i + 1}.pdf"
+        seen.add(filename)
+        filenames.append(filename)
+    return filenames
+
+def render_borehole(root_path, index, data, filename):
+    # Runs inside a worker process, so it must not depend on the Flask app
+    try:
+        form_data, profile = prepare_report_data(data)
+        generate_spt_report(form_data, profile, root_path=root_path, filename=filename)
+        return {'index': index, 'success': True, 'pdfPath': filename}
+    except Exception as e:
+        return {'index': index, 'success': False, 'error': str(e)}
+
+def submit_batch(root_path, boreholes):
+    executor = get_executor()
+    filenames = batch_filenames(boreholes)
+    return [executor.submit(render_borehole, root_path, i, data, filenames[i])
+            for i, data in enumerate(boreholes)]
+
+def generate_batch(root_path, boreholes):
+    # Render every borehole across the pool and return a manifest in input order
+    futures = submit_batch(root_path, boreholes)
+    return [future.result() for future in futures]
+
+class ZipStream:
+    # Write-only file object; zipfile falls back to data descriptors when the
+    # target is not seekable, which lets the archive be sent in chunks
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def stream_batch_zip(root_path, boreholes):
+    # Yield the ZIP archive piece by piece as each worker finishes its report
+    pdf_dir = get_pdf_store(root_path).directory
+    futures = submit_batch(root_path, boreholes)
+    results = []
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result['success']:
+                archive.write(os.path.join(pdf_dir, result['pdfPath']), result['pdfPath'])
+                yield stream.drain()
+
+        results.sort(key=lambda r: r['index'])
+        archive.writestr('manifest.json', json.dumps(results, ensure_ascii=False, indent=2))
+    yield stream.drain()
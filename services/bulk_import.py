@@ -0,0 +1,284 @@
+# Bulk import of boreholes from CSV/XLSX spreadsheets. Each row is one
+# interval of a borehole (layer + SPT sample); rows are read one at a time,
+# grouped by borehole number and rendered in batches:
+#
+#     python -m services.bulk_import sondagens.xlsx --batch-size 20
+import io
+import os
+import csv
+import sys
+import itertools
+import argparse
+import unicodedata
+from models.borehole import parse_float, parse_int
+from models.soil_layer import SoilLayer
+from models.spt_data import SPTData
+
+# Rows of at most this many boreholes are rendered together
+DEFAULT_BATCH_SIZE = 20
+
+# Normalized spreadsheet header -> payload field
+COLUMN_ALIASES = {
+    'furo': 'furo', 'sondagem': 'furo', 'spt': 'furo', 'spt_numero': 'furo', 'furo_spt': 'furo',
+    'de': 'start_depth', 'profundidade_inicial': 'start_depth', 'prof_inicial': 'start_depth', 'inicio': 'start_depth',
+    'ate': 'end_depth', 'profundidade_final': 'end_depth', 'prof_final': 'end_depth', 'fim': 'end_depth',
+    'descricao': 'description', 'classificacao': 'description', 'material': 'description',
+    'profundidade': 'depth', 'prof': 'depth',
+    'cota': 'cota',
+    'amostra': 'amostra',
+    'golpes_inicial': 'golpes_inicial', 'inicial': 'golpes_inicial', 'nspt_inicial': 'golpes_inicial',
+    'golpes_final': 'golpes_final', 'final': 'golpes_final', 'nspt_final': 'golpes_final', 'nspt': 'golpes_final',
+    'na': 'has_water_level', 'nivel_agua': 'has_water_level', 'agua': 'has_water_level',
+    'laudo': 'laudo_numero',
+}
+
+# Report header fields copied from the first row of each borehole
+FORM_FIELDS = (
+    'laudo_numero', 'obra', 'cliente', 'local', 'date', 'rel_numero', 'fl_numero',
+    'designer', 'surveyor', 'observacoes', 'metros_por_folha',
+    'empresa', 'endereco_empresa', 'responsavel_tecnico', 'crea',
+)
+
+TRUE_VALUES = ('1', 'x', 's', 'sim', 'true', 'verdadeiro', 'yes')
+
+def normalize_header(name):
+    # "Profundidade Inicial (m)" -> "profundidade_inicial"
+    name = unicodedata.normalize('NFKD', str(name or '')).encode('ascii', 'ignore').decode('ascii')
+    name = name.split('(')[0].strip().lower()
+    for char in ' -./':
+        name = name.replace(char, '_')
+    name = '_'.join(part for part in name.split('_') if part)
+    return COLUMN_ALIASES.get(name, name)
+
+def is_xlsx(filename):
+    return filename.lower().endswith(('.xlsx', '.xlsm'))
+
+def read_csv_rows(stream):
+    # Yield raw rows of a binary CSV stream; ';', ',' and tab separators are
+    # detected from the first lines, which are then fed back to the reader
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    sample = text.read(4096)
+    sample += text.readline()
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=';,\t')
+    except csv.Error:
+        dialect = csv.excel
+    try:
+        yield from csv.reader(itertools.chain(io.StringIO(sample, newline=''), text), dialect)
+    finally:
+        # Leave the caller's stream open
+        text.detach()
+
+def read_xlsx_rows(stream):
+    # Yield rows of the first sheet; openpyxl is only needed for XLSX files
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Importação de XLSX requer o pacote openpyxl (pip install openpyxl)")
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ['' if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+def read_rows(stream, filename):
+    # Yield (line_number, {field: value}) for every non-empty data row
+    rows = read_xlsx_rows(stream) if is_xlsx(filename) else read_csv_rows(stream)
+    header = None
+    for line_number, row in enumerate(rows, start=1):
+        if not any(str(value).strip() for value in row):
+            continue
+        if header is None:
+            header = [normalize_header(name) for name in row]
+            if 'furo' not in header:
+                raise ValueError("A planilha precisa de uma coluna 'furo' (número do SPT)")
+            continue
+        values = {}
+        for field, value in zip(header, row):
+            if field:
+                values[field] = value.strip() if isinstance(value, str) else value
+        yield line_number, values
+
+def parse_row(line_number, row):
+    # Map one row into (SoilLayer or None, SPTData or None); raises ValueError
+    label = f"Linha {line_number}"
+    layer = None
+    sample = None
+
+    if row.get('end_depth') not in (None, ''):
+        start_depth = parse_float(row.get('start_depth'), label, 'profundidade inicial')
+        end_depth = parse_float(row.get('end_depth'), label, 'profundidade final')
+        if end_depth < start_depth:
+            raise ValueError(f"{label}: profundidade final ({end_depth}) menor que a inicial ({start_depth})")
+        layer = SoilLayer(start_depth, end_depth, str(row.get('description') or ''))
+
+    if row.get('golpes_inicial') not in (None, '') or row.get('golpes_final') not in (None, ''):
+        depth = row.get('depth')
+        if depth in (None, ''):
+            if layer is None:
+                raise ValueError(f"{label}: amostra sem profundidade")
+            depth = layer.end_depth
+        cota = row.get('cota')
+        sample = SPTData(
+            parse_float(depth, label, 'profundidade'),
+            parse_float(cota, label, 'cota') if cota not in (None, '') else None,
+            str(row.get('amostra') or '') or None,
+            parse_int(row.get('golpes_inicial'), label, 'golpes inicial'),
+            parse_int(row.get('golpes_final'), label, 'golpes final'),
+            str(row.get('has_water_level') or '').strip().lower() in TRUE_VALUES,
+        )
+
+    if layer is None and sample is None:
+        raise ValueError(f"{label}: linha sem camada nem golpes")
+    return layer, sample
+
+def borehole_payload(furo, form_data, layers, samples):
+    # Same shape as the body of /api/generate-pdf
+    form_data = dict(form_data, spt_numero=furo)
+    return {
+        'formData': form_data,
+        'soilLayers': [
+            {'start_depth': l.start_depth, 'end_depth': l.end_depth, 'description': l.description}
+            for l in layers
+        ],
+        'sptData': [
+            {
+                'depth': s.depth,
+                'cota': s.cota,
+                'amostra': s.amostra,
+                'golpes_inicial': s.golpes_inicial,
+                'golpes_final': s.golpes_final,
+                'has_water_level': s.has_water_level,
+            }
+            for s in samples
+        ],
+    }
+
+def group_boreholes(rows):
+    # Consume (line_number, row) pairs and yield one dict per borehole:
+    # {'furo', 'lines', 'payload', 'errors'}. Rows of a borehole must be
+    # contiguous, so only the current borehole is held in memory.
+    current = None
+    finished = set()
+
+    def new_group(furo, line_number, row):
+        return {
+            'furo': furo,
+            'lines': [line_number, line_number],
+            'form_data': {field: str(row[field]) for field in FORM_FIELDS if row.get(field) not in (None, '')},
+            'layers': [],
+            'samples': [],
+            'errors': [],
+        }
+
+    def close(group):
+        finished.add(group['furo'])
+        return {
+            'furo': group['furo'],
+            'lines': tuple(group['lines']),
+            'payload': borehole_payload(group['furo'], group['form_data'], group['layers'], group['samples']),
+            'errors': group['errors'],
+        }
+
+    for line_number, row in rows:
+        furo = row.get('furo')
+        if isinstance(furo, float) and furo.is_integer():
+            # Spreadsheet cells hold numbers as floats
+            furo = int(furo)
+        furo = str(furo if furo is not None else '').strip()
+        if not furo:
+            yield {'furo': None, 'lines': (line_number, line_number), 'payload': None,
+                   'errors': [{'line': line_number, 'error': f"Linha {line_number}: número do furo vazio"}]}
+            continue
+
+        if current is None or furo != current['furo']:
+            if current is not None:
+                yield close(current)
+            current = new_group(furo, line_number, row)
+            if furo in finished:
+                current['errors'].append({'line': line_number, 'error': (
+                    f"Linha {line_number}: o furo {furo} aparece em linhas não consecutivas")})
+
+        current['lines'][1] = line_number
+        try:
+            layer, sample = parse_row(line_number, row)
+        except ValueError as e:
+            current['errors'].append({'line': line_number, 'error': str(e)})
+            continue
+        if layer is not None:
+            current['layers'].append(layer)
+        if sample is not None:
+            current['samples'].append(sample)
+
+    if current is not None:
+        yield close(current)
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def import_boreholes(root_path, stream, filename, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    # Yield one result per borehole as its batch finishes. Boreholes with
+    # invalid rows are reported and not rendered.
+    from services.batch_generator import generate_batch
+
+    boreholes = group_boreholes(read_rows(stream, filename))
+    for batch in batched(boreholes, batch_size):
+        valid = [b for b in batch if not b['errors']]
+        rendered = {}
+        if valid and not dry_run:
+            results = generate_batch(root_path, [b['payload'] for b in valid])
+            rendered = {id(b): result for b, result in zip(valid, results)}
+
+        for borehole in batch:
+            result = {'furo': borehole['furo'], 'lines': list(borehole['lines'])}
+            if borehole['errors']:
+                result.update(success=False, errors=borehole['errors'])
+            elif dry_run:
+                result.update(success=True, layers=len(borehole['payload']['soilLayers']),
+                              samples=len(borehole['payload']['sptData']))
+            else:
+                outcome = rendered[id(borehole)]
+                result['success'] = outcome['success']
+                if outcome['success']:
+                    result['pdfPath'] = outcome['pdfPath']
+                else:
+                    result['errors'] = [{'line': None, 'error': outcome['error']}]
+            yield result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Importação em lote de sondagens a partir de planilhas CSV/XLSX.')
+    parser.add_argument('arquivo', help='planilha CSV ou XLSX')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='sondagens geradas por lote')
+    parser.add_argument('--root', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help='raiz da aplicação (os PDFs vão para static/pdfs)')
+    parser.add_argument('--dry-run', action='store_true', help='só valida a planilha, sem gerar PDFs')
+    args = parser.parse_args(argv)
+
+    failed = 0
+    with open(args.arquivo, 'rb') as f:
+        try:
+            for result in import_boreholes(args.root, f, args.arquivo, args.batch_size, args.dry_run):
+                lines = f"linhas {result['lines'][0]}-{result['lines'][1]}"
+                if result['success']:
+                    print(f"Furo {result['furo']} ({lines}): {result.get('pdfPath', 'ok')}")
+                    continue
+                failed += 1
+                print(f"Furo {result['furo']} ({lines}): erro", file=sys.stderr)
+                for error in result['errors']:
+                    print(f"  {error['error']}", file=sys.stderr)
+        except ValueError as e:
+            print(f"Erro: {e}", file=sys.stderr)
+            return 2
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
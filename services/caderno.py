@@ -0,0 +1,181 @@
+import io
+import math
+from flask import current_app
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from services.report_data import prepare_report_data
+from services.output_profiles import parse_output_profile
+from services.pdf_generator import draw_report_pages, open_report_canvas
+from services.metrics import SIZE_BUCKETS, metrics
+
+# Upper bound on boreholes bound into one caderno
+MAX_CADERNO_SIZE = 200
+
+# Rows of the index table per sheet
+INDEX_ROWS = 38
+
+# Form XObject of each index sheet, filled in once the page numbers are known
+INDEX_FORM_NAME = 'CadernoIndice%d'
+
+# Index table columns: (title, width in mm, row key)
+INDEX_COLUMNS = (
+    ('SONDAGEM', 24, 'sondagem'),
+    ('LAUDO', 30, 'laudo_numero'),
+    ('COTA', 20, 'cota'),
+    ('PROF. (m)', 22, 'profundidade'),
+    ('N.A. (m)', 22, 'nivel_agua'),
+    ('AMOSTRAS', 22, 'amostras'),
+    ('FOLHAS', 18, 'folhas'),
+    ('PÁGINA', 22, 'pagina'),
+)
+
+def caderno_filename(form_data):
+    return f"Caderno_SPT_{form_data.get('laudo_numero') or form_data.get('obra') or 'obra'}.pdf"
+
+def borehole_payload(form_data, data):
+    # The caderno's form data (obra, cliente, empresa...) with the borehole's
+    # own fields on top. The output profile is the caderno's: every sheet is
+    # drawn on the same canvas.
+    merged = dict(form_data, **(data.get('formData') or {}))
+    merged['perfil_saida'] = form_data['perfil_saida']
+    merged['escala_cinza'] = form_data['escala_cinza']
+    return dict(data, formData=merged)
+
+def prepare_caderno(data):
+    # Validate every borehole before anything is drawn. Returns the shared
+    # form data, the raw borehole payloads and one index row per borehole;
+    # profiles are not kept, each is rebuilt right before its sheets.
+    form_data = dict(data.get('formData') or {})
+    boreholes = data.get('boreholes') or []
+    if not boreholes:
+        raise ValueError("Nenhuma sondagem informada")
+    if len(boreholes) > MAX_CADERNO_SIZE:
+        raise ValueError(f"O caderno aceita no máximo {MAX_CADERNO_SIZE} sondagens")
+    form_data['perfil_saida'] = parse_output_profile(form_data.get('perfil_saida'))
+    form_data['escala_cinza'] = form_data.get('escala_cinza') in (True, '1', 'true', 'sim')
+
+    rows = []
+    for i, borehole in enumerate(boreholes):
+        try:
+            borehole_form, profile = prepare_report_data(borehole_payload(form_data, borehole))
+        except ValueError as e:
+            raise ValueError(f"Sondagem {i + 1}: {e}")
+        water = profile.water_level_depth
+        rows.append({
+            'sondagem': f"SP-{borehole_form.get('spt_numero') or i + 1}",
+            'laudo_numero': str(borehole_form.get('laudo_numero') or ''),
+            'cota': str(borehole_form.get('cota') or ''),
+            'profundidade': f"{profile.max_layer_depth:.2f}",
+            'nivel_agua': f"{water:.2f}" if water is not None else '-',
+            'amostras': str(profile.sample_count),
+        })
+    return form_data, boreholes, rows
+
+def render_caderno(form_data, boreholes, rows, root_path=None):
+    # Every borehole of the obra in one PDF, after an index. The sheets share
+    # one canvas, so fonts, the logo image and the frame form are embedded
+    # once and referenced from every page. Boreholes are prepared, laid out
+    # and drawn one at a time and dropped after their last sheet.
+    if root_path is None:
+        root_path = current_app.root_path
+
+    buffer = io.BytesIO()
+    c, logo = open_report_canvas(buffer, form_data, root_path)
+
+    # The index comes first but its page numbers are only known at the end:
+    # each index sheet shows a form that is filled in after the boreholes
+    index_sheets = math.ceil(len(rows) / INDEX_ROWS)
+    for sheet in range(index_sheets):
+        c.doForm(INDEX_FORM_NAME % sheet)
+        c.showPage()
+
+    for i, (borehole, row) in enumerate(zip(boreholes, rows)):
+        first_page = c.getPageNumber()
+        key = f"sondagem{i}"
+        c.bookmarkPage(key)
+        c.addOutlineEntry(row['sondagem'], key, level=0)
+
+        with metrics.stage('prepare'):
+            borehole_form, profile = prepare_report_data(borehole_payload(form_data, borehole))
+        draw_report_pages(c, borehole_form, profile, logo)
+        row['pagina'] = str(first_page)
+        row['folhas'] = str(c.getPageNumber() - first_page)
+
+    with metrics.stage('draw_index'):
+        for sheet in range(index_sheets):
+            c.beginForm(INDEX_FORM_NAME % sheet)
+            draw_index_sheet(c, form_data, rows[sheet * INDEX_ROWS:(sheet + 1) * INDEX_ROWS],
+                             sheet, index_sheets, logo)
+            c.endForm()
+
+    with metrics.stage('save'):
+        c.save()
+
+    pdf_bytes = buffer.getvalue()
+    metrics.inc('spt_reports_total')
+    metrics.observe('spt_pdf_size_bytes', len(pdf_bytes), buckets=SIZE_BUCKETS)
+    return pdf_bytes
+
+def draw_index_sheet(c, form_data, rows, sheet, sheet_count, logo):
+    width, height = A4
+
+    # Border and title block
+    c.rect(10*mm, 10*mm, width - 20*mm, height - 20*mm, stroke=1, fill=0)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawCentredString(width / 2, height - 22*mm, "CADERNO DE SONDAGENS")
+    c.setFont("Helvetica", 8)
+    details = [
+        f"Obra: {form_data.get('obra', '')}",
+        f"Cliente: {form_data.get('cliente', '')}",
+        f"Local: {form_data.get('local', '')}",
+    ]
+    for i, text in enumerate(details):
+        c.drawString(20*mm, height - 32*mm - i*4.5*mm, text)
+
+    # Index table: header row plus one row per borehole, ruled with one path
+    row_height = 5.5*mm
+    table_width = sum(w for _, w, _ in INDEX_COLUMNS) * mm
+    x0 = (width - table_width) / 2
+    top = height - 50*mm
+    bottom = top - (len(rows) + 1) * row_height
+    grid = c.beginPath()
+    for i in range(len(rows) + 2):
+        y = top - i * row_height
+        grid.moveTo(x0, y)
+        grid.lineTo(x0 + table_width, y)
+    x = x0
+    for _, column_width, _ in INDEX_COLUMNS:
+        grid.moveTo(x, top)
+        grid.lineTo(x, bottom)
+        x += column_width * mm
+    grid.moveTo(x, top)
+    grid.lineTo(x, bottom)
+    c.setLineWidth(0.5)
+    c.drawPath(grid, stroke=1, fill=0)
+    c.setLineWidth(1)
+
+    c.setFont("Helvetica-Bold", 7)
+    x = x0
+    for title, column_width, _ in INDEX_COLUMNS:
+        c.drawCentredString(x + column_width * mm / 2, top - row_height + 1.8*mm, title)
+        x += column_width * mm
+
+    c.setFont("Helvetica", 7)
+    for i, row in enumerate(rows):
+        y = top - (i + 2) * row_height + 1.8*mm
+        x = x0
+        for _, column_width, key in INDEX_COLUMNS:
+            c.drawCentredString(x + column_width * mm / 2, y, row[key])
+            x += column_width * mm
+
+    # Company data, logo and sheet counter
+    c.setFont("Helvetica", 7)
+    right = width - 15*mm
+    c.drawRightString(right, 24*mm, form_data.get('empresa', ''))
+    c.drawRightString(right, 20*mm, form_data.get('endereco_empresa', ''))
+    c.drawRightString(right, 16*mm, " - ".join(
+        text for text in (form_data.get('responsavel_tecnico', ''), form_data.get('crea', '')) if text))
+    c.setFont("Helvetica", 6)
+    c.drawCentredString(width / 2, 13*mm, f"Índice {sheet + 1}/{sheet_count}")
+    if logo is not None:
+        c.drawImage(logo, 15*mm, 13*mm, width=25*mm, height=15*mm)
@@ -0,0 +1,303 @@
+import math
+from bisect import bisect_right
+from reportlab.lib.units import mm
+from models.borehole import parse_float
+from services.report_data import prepare_report_data
+from services.report_layout import DEFAULT_MAX_DEPTH
+
+# Upper bound on boreholes accepted in one cross-section
+MAX_SECTION_BOREHOLES = 200
+
+# Nodes of the NSPT interpolation grid (columns along the alignment x rows in elevation)
+GRID_COLUMNS = 120
+GRID_ROWS = 90
+
+# NSPT classes filled between the boreholes: (upper bound, label)
+NSPT_CLASSES = (
+    (4, 'NSPT ≤ 4'),
+    (8, 'NSPT 5 – 8'),
+    (18, 'NSPT 9 – 18'),
+    (40, 'NSPT 19 – 40'),
+    (math.inf, 'NSPT > 40'),
+)
+
+# NSPT values traced as contour lines
+CONTOUR_LEVELS = (5, 10, 20, 30, 40)
+
+# Marching squares: corner mask (tl=8, tr=4, br=2, bl=1) -> pairs of crossed
+# edges (0 top, 1 right, 2 bottom, 3 left)
+CONTOUR_CASES = (
+    (), ((3, 2),), ((2, 1),), ((3, 1),),
+    ((0, 1),), ((3, 0), (2, 1)), ((0, 2),), ((3, 0),),
+    ((3, 0),), ((0, 2),), ((3, 2), (0, 1)), ((0, 1),),
+    ((3, 1),), ((2, 1),), ((3, 2),), (),
+)
+
+def parse_elevation(value, label):
+    # Ground elevation (cota) may be negative, unlike depths
+    if value is None or value == '':
+        return 0.0
+    try:
+        number = float(str(value).strip().replace(',', '.'))
+    except ValueError:
+        raise ValueError(f"{label}: valor inválido para cota ({value!r})")
+    if math.isnan(number) or math.isinf(number):
+        raise ValueError(f"{label}: valor inválido para cota ({value!r})")
+    return number
+
+def prepare_cross_section(data):
+    # Validate {"formData": {...}, "boreholes": [{"position", "cota",
+    # "formData", "soilLayers", "sptData"}, ...]} into sections sorted
+    # along the alignment; raises ValueError on bad input
+    form_data = data.get('formData', {}) or {}
+    boreholes = data.get('boreholes', []) or []
+    if len(boreholes) < 2:
+        raise ValueError("O perfil precisa de pelo menos duas sondagens")
+    if len(boreholes) > MAX_SECTION_BOREHOLES:
+        raise ValueError(f"O perfil aceita no máximo {MAX_SECTION_BOREHOLES} sondagens")
+
+    sections = []
+    for i, borehole in enumerate(boreholes):
+        label = f"Sondagem {i + 1}"
+        try:
+            borehole_form, profile = prepare_report_data(borehole)
+        except ValueError as e:
+            raise ValueError(f"{label}: {e}")
+        if borehole.get('position') in (None, ''):
+            raise ValueError(f"{label}: posição não informada")
+        cota = borehole.get('cota', borehole_form.get('cota'))
+        sections.append({
+            'name': str(borehole_form.get('spt_numero') or i + 1),
+            'position': parse_float(borehole.get('position'), label, 'posição'),
+            'ground': parse_elevation(cota, label),
+            'profile': profile,
+        })
+
+    sections.sort(key=lambda s: s['position'])
+    for previous, section in zip(sections, sections[1:]):
+        if section['position'] == previous['position']:
+            raise ValueError(f"Sondagens {previous['name']} e {section['name']} na mesma posição")
+    return form_data, sections
+
+def interp(x, xp, fp):
+    # Piecewise-linear values of (xp, fp) at the ascending points x in one
+    # merge pass, like numpy.interp; None outside [xp[0], xp[-1]]
+    values = []
+    n = len(xp)
+    j = 0
+    for v in x:
+        if n == 0 or v < xp[0] or v > xp[-1]:
+            values.append(None)
+            continue
+        if n == 1:
+            values.append(fp[0])
+            continue
+        while j < n - 2 and xp[j + 1] < v:
+            j += 1
+        x0 = xp[j]
+        x1 = xp[j + 1]
+        t = (v - x0) / (x1 - x0) if x1 > x0 else 0.0
+        values.append(fp[j] + (fp[j + 1] - fp[j]) * t)
+    return values
+
+def lerp_columns(a, b, t):
+    # Blend two column vectors; a node is empty if either side is
+    return [None if va is None or vb is None else va + (vb - va) * t for va, vb in zip(a, b)]
+
+def nspt_class(value):
+    for index, (upper, _) in enumerate(NSPT_CLASSES):
+        if value <= upper:
+            return index
+    return len(NSPT_CLASSES) - 1
+
+class CrossSectionLayout:
+    # Positions, interpolated layer boundaries, NSPT grid, class fills and
+    # contour segments of the longitudinal profile, computed once for the
+    # drawing code. Horizontal axis is the position along the alignment (m),
+    # vertical axis the elevation (m).
+    def __init__(self, width, height, sections, columns=GRID_COLUMNS, rows=GRID_ROWS):
+        self.width = width
+        self.height = height
+        self.sections = sections
+
+        # Plot area between the title block and the legend/footer
+        self.plot_x = 15*mm + 18*mm
+        self.plot_width = width - 15*mm - 5*mm - self.plot_x
+        self.plot_y = 15*mm + 25*mm + 8*mm
+        self.plot_height = height - 15*mm - 20*mm - 8*mm - self.plot_y
+        padding = 8*mm
+
+        positions = [s['position'] for s in sections]
+        depths = [max(s['profile'].max_layer_depth, s['profile'].max_sample_depth) or DEFAULT_MAX_DEPTH
+                  for s in sections]
+        self.x_min = positions[0]
+        self.x_max = positions[-1]
+        self.z_top = max(s['ground'] for s in sections)
+        self.z_bottom = min(s['ground'] - depth for s, depth in zip(sections, depths))
+        self.x_scale = (self.plot_width - 2*padding) / (self.x_max - self.x_min)
+        self.z_scale = self.plot_height / (self.z_top - self.z_bottom)
+        self.x_origin = self.plot_x + padding
+
+        spacing = min(b - a for a, b in zip(positions, positions[1:])) * self.x_scale
+        self.column_width = min(4*mm, spacing * 0.4)
+
+        self.columns = [self.column(s, depth) for s, depth in zip(sections, depths)]
+        self.ground_line = [(col['x'], col['top']) for col in self.columns]
+        self.layer_lines = self.boundary_lines()
+        self.grid_x, self.grid_y, self.grid = self.nspt_grid(columns, rows)
+        self.class_runs = self.fill_runs()
+        self.contours = self.contour_segments()
+
+    def to_x(self, position):
+        return self.x_origin + (position - self.x_min) * self.x_scale
+
+    def to_y(self, elevation):
+        return self.plot_y + (elevation - self.z_bottom) * self.z_scale
+
+    def column(self, section, depth):
+        profile = section['profile']
+        ground = section['ground']
+        return {
+            'name': section['name'],
+            'x': self.to_x(section['position']),
+            'position': section['position'],
+            'top': self.to_y(ground),
+            'bottom': self.to_y(ground - depth),
+            'boundaries': [self.to_y(ground - end) for end in profile.layer_ends],
+            'samples': [(self.to_y(ground - d), n) for d, n in zip(profile.depths, profile.golpes_final)],
+        }
+
+    def boundary_lines(self):
+        # Join the k-th layer boundary of each borehole with the k-th of the
+        # next one; boundaries without a partner pinch out halfway
+        half = self.column_width / 2
+        lines = []
+        for left, right in zip(self.columns, self.columns[1:]):
+            x1 = left['x'] + half
+            x2 = right['x'] - half
+            middle = (x1 + x2) / 2
+            a = left['boundaries']
+            b = right['boundaries']
+            for k in range(max(len(a), len(b))):
+                if k < len(a) and k < len(b):
+                    lines.append((x1, a[k], x2, b[k]))
+                elif k < len(a):
+                    lines.append((x1, a[k], middle, a[k]))
+                else:
+                    lines.append((middle, b[k], x2, b[k]))
+        return lines
+
+    def nspt_grid(self, columns, rows):
+        # NSPT at every grid node: each borehole is interpolated in depth for
+        # all rows at once, then the grid columns blend the two neighbouring
+        # boreholes. Nodes above the ground or below a borehole are None.
+        grid_y = [self.plot_y + self.plot_height * (rows - 1 - r) / (rows - 1) for r in range(rows)]
+        elevations = [self.z_bottom + (y - self.plot_y) / self.z_scale for y in grid_y]
+
+        vectors = []
+        for section in self.sections:
+            profile = section['profile']
+            xp = list(profile.depths)
+            fp = [float(n) for n in profile.golpes_final]
+            if xp and xp[0] > 0:
+                # Surface down to the first sample takes the first NSPT
+                xp.insert(0, 0.0)
+                fp.insert(0, fp[0])
+            vectors.append(interp([section['ground'] - z for z in elevations], xp, fp))
+
+        x_left = self.to_x(self.x_min)
+        x_right = self.to_x(self.x_max)
+        grid_x = [x_left + (x_right - x_left) * c / (columns - 1) for c in range(columns)]
+        positions = [s['position'] for s in self.sections]
+        grid_columns = []
+        for x in grid_x:
+            position = self.x_min + (x - x_left) / self.x_scale
+            k = min(max(bisect_right(positions, position) - 1, 0), len(positions) - 2)
+            t = (position - positions[k]) / (positions[k + 1] - positions[k])
+            grid_columns.append(lerp_columns(vectors[k], vectors[k + 1], min(max(t, 0.0), 1.0)))
+
+        # Row-major copy: grid[r][c]
+        grid = [list(row) for row in zip(*grid_columns)]
+        return grid_x, grid_y, grid
+
+    def cells(self):
+        # (row, column, top-left, top-right, bottom-right, bottom-left) for
+        # every grid cell whose four corners have a value
+        grid = self.grid
+        for r in range(len(grid) - 1):
+            top = grid[r]
+            bottom = grid[r + 1]
+            for c in range(len(top) - 1):
+                tl, tr, br, bl = top[c], top[c + 1], bottom[c + 1], bottom[c]
+                if tl is None or tr is None or br is None or bl is None:
+                    continue
+                yield r, c, tl, tr, br, bl
+
+    def fill_runs(self):
+        # Horizontal runs of cells in the same NSPT class: class -> [(x, y, w, h)]
+        runs = {index: [] for index in range(len(NSPT_CLASSES))}
+        current = None
+        for r, c, tl, tr, br, bl in self.cells():
+            index = nspt_class((tl + tr + br + bl) / 4)
+            if current and current[0] == index and current[1] == r and current[3] == c:
+                current[3] = c + 1
+                continue
+            if current:
+                self.close_run(runs, current)
+            current = [index, r, c, c + 1]
+        if current:
+            self.close_run(runs, current)
+        return runs
+
+    def close_run(self, runs, run):
+        index, r, c1, c2 = run
+        x = self.grid_x[c1]
+        y = self.grid_y[r + 1]
+        runs[index].append((x, y, self.grid_x[c2] - x, self.grid_y[r] - y))
+
+    def contour_segments(self):
+        # Marching squares over the grid: level -> [(x1, y1, x2, y2)]
+        segments = {level: [] for level in CONTOUR_LEVELS}
+        gx = self.grid_x
+        gy = self.grid_y
+        for r, c, tl, tr, br, bl in self.cells():
+            low = min(tl, tr, br, bl)
+            high = max(tl, tr, br, bl)
+            for level in CONTOUR_LEVELS:
+                if level <= low or level > high:
+                    continue
+                mask = (tl >= level) * 8 + (tr >= level) * 4 + (br >= level) * 2 + (bl >= level)
+                x1, x2 = gx[c], gx[c + 1]
+                y1, y2 = gy[r], gy[r + 1]
+                edges = (
+                    (x1 + (x2 - x1) * crossing(tl, tr, level), y1),
+                    (x2, y1 + (y2 - y1) * crossing(tr, br, level)),
+                    (x1 + (x2 - x1) * crossing(bl, br, level), y2),
+                    (x1, y1 + (y2 - y1) * crossing(tl, bl, level)),
+                )
+                for a, b in CONTOUR_CASES[mask]:
+                    segments[level].append(edges[a] + edges[b])
+        return segments
+
+    def elevation_ticks(self, count=8):
+        # Round elevation marks for the vertical axis
+        span = self.z_top - self.z_bottom
+        step = nice_step(span / count)
+        first = math.ceil(self.z_bottom / step) * step
+        ticks = []
+        value = first
+        while value <= self.z_top + 1e-9:
+            ticks.append((self.to_y(value), f"{value:.1f}"))
+            value += step
+        return ticks
+
+def crossing(a, b, level):
+    # Fraction along an edge from value a to value b where level is reached
+    return (level - a) / (b - a) if b != a else 0.5
+
+def nice_step(raw):
+    magnitude = 10 ** math.floor(math.log10(raw)) if raw > 0 else 1
+    for factor in (1, 2, 2.5, 5, 10):
+        if raw <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
@@ -0,0 +1,194 @@
+import io
+from flask import current_app
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+from services.cross_section import NSPT_CLASSES, CrossSectionLayout
+from services.metrics import SIZE_BUCKETS, metrics
+from services.resources import resources
+
+# Fill colours of the NSPT classes, light (soft) to dark (dense)
+CLASS_COLORS = (
+    (1.00, 0.96, 0.80),
+    (0.99, 0.87, 0.60),
+    (0.95, 0.70, 0.40),
+    (0.80, 0.50, 0.30),
+    (0.55, 0.33, 0.20),
+)
+
+def cross_section_filename(form_data):
+    return f"Perfil_SPT_{form_data.get('laudo_numero') or form_data.get('obra') or 'obra'}.pdf"
+
+def render_cross_section(form_data, sections, root_path=None):
+    # One landscape page with every borehole of the alignment; returns PDF bytes
+    if root_path is None:
+        root_path = current_app.root_path
+
+    buffer = io.BytesIO()
+    width, height = landscape(A4)
+    c = canvas.Canvas(buffer, pagesize=(width, height))
+
+    with metrics.stage('cross_section_layout'):
+        layout = CrossSectionLayout(width, height, sections)
+
+    with metrics.stage('cross_section_draw'):
+        draw_section_frame(c, layout, form_data)
+        draw_nspt_classes(c, layout)
+        draw_contours(c, layout)
+        draw_layer_lines(c, layout)
+        draw_borehole_columns(c, layout)
+        draw_axes(c, layout)
+        draw_section_footer(c, layout, form_data, root_path)
+
+    c.showPage()
+    with metrics.stage('save'):
+        c.save()
+
+    pdf_bytes = buffer.getvalue()
+    metrics.inc('spt_reports_total')
+    metrics.observe('spt_pdf_size_bytes', len(pdf_bytes), buckets=SIZE_BUCKETS)
+    return pdf_bytes
+
+def draw_section_frame(c, layout, form_data):
+    width, height = layout.width, layout.height
+
+    # Border and plot area
+    c.rect(10*mm, 10*mm, width - 20*mm, height - 20*mm, stroke=1, fill=0)
+    c.rect(layout.plot_x, layout.plot_y, layout.plot_width, layout.plot_height, stroke=1, fill=0)
+
+    # Title block
+    c.setFont("Helvetica-Bold", 11)
+    c.drawCentredString(width / 2, height - 20*mm, "PERFIL GEOTÉCNICO LONGITUDINAL")
+    c.setFont("Helvetica", 8)
+    details = [
+        f"Obra: {form_data.get('obra', '')}",
+        f"Cliente: {form_data.get('cliente', '')}",
+        f"Local: {form_data.get('local', '')}",
+        f"Sondagens: {len(layout.columns)}",
+    ]
+    c.drawCentredString(width / 2, height - 26*mm, "   |   ".join(details))
+
+def draw_nspt_classes(c, layout):
+    # One filled path per NSPT class made of the merged cell runs
+    for index, runs in layout.class_runs.items():
+        if not runs:
+            continue
+        c.setFillColorRGB(*CLASS_COLORS[index])
+        path = c.beginPath()
+        for x, y, w, h in runs:
+            path.rect(x, y, w, h)
+        c.drawPath(path, stroke=0, fill=1)
+    c.setFillColorRGB(0, 0, 0)
+
+def draw_contours(c, layout):
+    # NSPT iso-lines, one path per level, labelled once near the middle
+    c.setStrokeColorRGB(0.35, 0.35, 0.35)
+    c.setLineWidth(0.4)
+    c.setDash([1.5, 1.5], 0)
+    c.setFont("Helvetica", 5)
+    for level, segments in layout.contours.items():
+        if not segments:
+            continue
+        path = c.beginPath()
+        for x1, y1, x2, y2 in segments:
+            path.moveTo(x1, y1)
+            path.lineTo(x2, y2)
+        c.drawPath(path, stroke=1, fill=0)
+        x1, y1, x2, y2 = segments[len(segments) // 2]
+        c.drawString((x1 + x2) / 2 + 0.5*mm, (y1 + y2) / 2, str(level))
+    c.setDash([], 0)
+    c.setLineWidth(1)
+    c.setStrokeColorRGB(0, 0, 0)
+
+def draw_layer_lines(c, layout):
+    # Ground surface and interpolated layer boundaries
+    c.setLineWidth(0.3)
+    c.setStrokeColorRGB(0.25, 0.25, 0.25)
+    path = c.beginPath()
+    for x1, y1, x2, y2 in layout.layer_lines:
+        path.moveTo(x1, y1)
+        path.lineTo(x2, y2)
+    c.drawPath(path, stroke=1, fill=0)
+    c.setStrokeColorRGB(0, 0, 0)
+
+    c.setLineWidth(1.2)
+    ground = c.beginPath()
+    x, y = layout.ground_line[0]
+    ground.moveTo(x, y)
+    for x, y in layout.ground_line[1:]:
+        ground.lineTo(x, y)
+    c.drawPath(ground, stroke=1, fill=0)
+    c.setLineWidth(1)
+
+def draw_borehole_columns(c, layout):
+    # White strip per borehole with its layer boundaries and NSPT values
+    half = layout.column_width / 2
+    c.setLineWidth(0.5)
+    c.setFillColorRGB(1, 1, 1)
+    strips = c.beginPath()
+    for col in layout.columns:
+        strips.rect(col['x'] - half, col['bottom'], layout.column_width, col['top'] - col['bottom'])
+    c.drawPath(strips, stroke=1, fill=1)
+    c.setFillColorRGB(0, 0, 0)
+
+    ticks = c.beginPath()
+    for col in layout.columns:
+        for y in col['boundaries']:
+            ticks.moveTo(col['x'] - half, y)
+            ticks.lineTo(col['x'] + half, y)
+    c.drawPath(ticks, stroke=1, fill=0)
+    c.setLineWidth(1)
+
+    values = c.beginText()
+    values.setFont("Helvetica", 4)
+    for col in layout.columns:
+        for y, nspt in col['samples']:
+            values.setTextOrigin(col['x'] + half + 0.5*mm, y - 1.2)
+            values.textOut(str(nspt))
+    c.drawText(values)
+
+    c.setFont("Helvetica-Bold", 6)
+    for col in layout.columns:
+        c.drawCentredString(col['x'], layout.plot_y + layout.plot_height + 2*mm, f"SP-{col['name']}")
+
+def draw_axes(c, layout):
+    # Elevations on the left, positions along the alignment below the plot
+    c.setFont("Helvetica", 6)
+    x = layout.plot_x
+    for y, label in layout.elevation_ticks():
+        c.line(x - 1.5*mm, y, x, y)
+        c.drawRightString(x - 2*mm, y - 2, label)
+    c.saveState()
+    c.rotate(90)
+    c.drawCentredString(layout.plot_y + layout.plot_height / 2, -(x - 13*mm), "COTA (m)")
+    c.restoreState()
+
+    y = layout.plot_y
+    for col in layout.columns:
+        c.line(col['x'], y, col['x'], y - 1.5*mm)
+        c.drawCentredString(col['x'], y - 4*mm, f"{col['position']:.1f}")
+    c.drawCentredString(layout.plot_x + layout.plot_width / 2, y - 7.5*mm, "POSIÇÃO NO ALINHAMENTO (m)")
+
+def draw_section_footer(c, layout, form_data, root_path):
+    # NSPT legend, company data and logo
+    x = 15*mm
+    y = 22*mm
+    c.setFont("Helvetica", 6)
+    for index, (_, label) in enumerate(NSPT_CLASSES):
+        c.setFillColorRGB(*CLASS_COLORS[index])
+        c.rect(x, y, 5*mm, 3*mm, stroke=1, fill=1)
+        c.setFillColorRGB(0, 0, 0)
+        c.drawString(x + 6*mm, y + 0.8*mm, label)
+        x += 28*mm
+    c.drawString(x, y + 0.8*mm, "- - -  isolinhas de NSPT")
+
+    c.setFont("Helvetica", 7)
+    right = layout.width - 15*mm
+    c.drawRightString(right, 24*mm, form_data.get('empresa', ''))
+    c.drawRightString(right, 20*mm, form_data.get('endereco_empresa', ''))
+    c.drawRightString(right, 16*mm, " - ".join(
+        text for text in (form_data.get('responsavel_tecnico', ''), form_data.get('crea', '')) if text))
+
+    logo = resources.logo(root_path)
+    if logo is not None:
+        c.drawImage(logo, 15*mm, 12*mm, width=15*mm, height=9*mm)
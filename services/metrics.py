@@ -0,0 +1,146 @@
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Histogram buckets: seconds for durations, bytes for sizes
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Metric name -> (type, help text)
+METRICS = {
+    'spt_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status'),
+    'spt_http_request_duration_seconds': ('histogram', 'HTTP request duration'),
+    'spt_http_request_size_bytes': ('histogram', 'HTTP request body size'),
+    'spt_http_response_size_bytes': ('histogram', 'HTTP response body size'),
+    'spt_stage_duration_seconds': ('histogram', 'Time spent in each report generation stage'),
+    'spt_pdf_size_bytes': ('histogram', 'Size of the generated PDFs'),
+    'spt_reports_total': ('counter', 'Reports rendered'),
+}
+
+# Per-request list of (stage, seconds) used for the Server-Timing header
+request_timings = ContextVar('request_timings', default=None)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class NoopStage:
+    # Shared do-nothing context manager returned while metrics are disabled
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NOOP_STAGE = NoopStage()
+
+class StageTimer:
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.registry.observe('spt_stage_duration_seconds', elapsed, (('stage', self.name),))
+        timings = request_timings.get()
+        if timings is not None:
+            timings.append((self.name, elapsed))
+        return False
+
+class MetricsRegistry:
+    # Process-wide counters and histograms exposed in Prometheus text format.
+    # While disabled, stage() hands back a shared no-op and nothing is recorded.
+    def __init__(self):
+        self.enabled = False
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def stage(self, name):
+        if not self.enabled:
+            return NOOP_STAGE
+        return StageTimer(self, name)
+
+    def inc(self, name, labels=(), value=1):
+        if not self.enabled:
+            return
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=(), buckets=DURATION_BUCKETS):
+        if not self.enabled:
+            return
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def start_request(self):
+        # Collect stage timings of the current request for Server-Timing
+        return request_timings.set([])
+
+    def finish_request(self, token):
+        timings = request_timings.get()
+        request_timings.reset(token)
+        return timings or []
+
+    def render(self):
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                for (metric, labels), value in counters:
+                    if metric == name:
+                        lines.append(f"{name}{format_labels(labels)} {value}")
+            else:
+                for (metric, labels), histogram in histograms:
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{format_labels(labels + (('le', repr(float(bound))),))} {cumulative}")
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return "{" + pairs + "}"
+
+def server_timing_header(timings):
+    # Sum repeated stages (e.g. one per sheet) into a single entry each
+    totals = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items())
+
+# Process-wide registry, enabled by the app at startup
+metrics = MetricsRegistry()
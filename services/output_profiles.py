@@ -0,0 +1,31 @@
+# Output profiles of the laudo PDF, chosen with form_data['perfil_saida'].
+# Kept free of ReportLab imports so requests can be validated without
+# loading the PDF engine.
+OUTPUT_PROFILES = {
+    # Full quality for filing: the logo embedded at its original resolution
+    # and document metadata (title, subject, author) filled from the laudo
+    'archive': {
+        'label': 'Arquivo (qualidade total)',
+        'logo_dpi': None,
+        'metadata': True,
+    },
+    # Small files for phones: logo downsampled to a JPEG and the document
+    # information dictionary left empty
+    'mobile': {
+        'label': 'Celular (arquivo reduzido)',
+        'logo_dpi': 150,
+        'metadata': False,
+    },
+}
+
+DEFAULT_OUTPUT_PROFILE = 'archive'
+
+def parse_output_profile(value):
+    name = str(value or DEFAULT_OUTPUT_PROFILE).strip().lower()
+    if name not in OUTPUT_PROFILES:
+        raise ValueError(f"Perfil de saída desconhecido ({value!r}), use {' ou '.join(OUTPUT_PROFILES)}")
+    return name
+
+def output_profile(form_data):
+    # Settings of the profile named in a normalized form_data
+    return OUTPUT_PROFILES[form_data.get('perfil_saida') or DEFAULT_OUTPUT_PROFILE]
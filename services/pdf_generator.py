@@ -1,33 +1,101 @@
-import os
 import io
 from datetime import datetime
+from functools import lru_cache
 from flask import current_app
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import Paragraph
-from reportlab.lib.colors import blue, red, black
+from reportlab.lib.colors import Color, toColor
+from services.report_layout import DESCRIPTION_FONT, ReportLayout, page_geometry
+from services.metrics import SIZE_BUCKETS, metrics
+from services.resources import resources
+from services.pdf_store import get_pdf_store
+from services.report_cache import payload_key
+from services.output_profiles import output_profile
+from services.pile_capacity import AOKI_VELLOSO_SAFETY, DECOURT_SAFETY, PILE_TYPES, pile_capacity
 
-def generate_spt_report(form_data, soil_layers, spt_data):
+# Name of the form XObject holding the static report skeleton
+FRAME_FORM_NAME = 'SPTFrame'
+
+def report_filename(form_data):
     # Create filename based on report number or timestamp
-    filename = f"Laudo_SPT_{form_data.get('laudo_numero', datetime.now().strftime('%Y%m%d%H%M%S'))}.pdf"
-    pdf_dir = os.path.join(current_app.root_path, 'static', 'pdfs')
-    pdf_path = os.path.join(pdf_dir, filename)
+    return f"Laudo_SPT_{form_data.get('laudo_numero', datetime.now().strftime('%Y%m%d%H%M%S'))}.pdf"
+
+def generate_spt_report(form_data, profile, root_path=None, filename=None):
+    # profile is a models.borehole.BoreholeProfile
+    # root_path lets the report be generated outside of a Flask app context
+    # (e.g. in a worker process); it defaults to the current app
+    if root_path is None:
+        root_path = current_app.root_path
+    
+    if filename is None:
+        filename = report_filename(form_data)
+    
+    # Atomic write into static/pdfs; an unchanged report is not written again.
+    # The payload key identifies the content: the PDF bytes differ on every
+    # render (creation date and document ID), the payload does not.
+    key = payload_key(form_data, profile)
+    pdf_bytes = render_spt_report(form_data, profile, root_path)
+    with metrics.stage('write'):
+        get_pdf_store(root_path).save(filename, pdf_bytes, digest=key)
     
-    # Create PDF document
-    c = canvas.Canvas(pdf_path, pagesize=A4)
-    width, height = A4
+    return filename
+
+def render_spt_report(form_data, profile, root_path=None):
+    # Render the report into memory and return the PDF bytes, without touching the disk
+    if root_path is None:
+        root_path = current_app.root_path
+    
+    buffer = io.BytesIO()
+    build_spt_report(buffer, form_data, profile, root_path)
+    pdf_bytes = buffer.getvalue()
+    
+    metrics.inc('spt_reports_total')
+    metrics.observe('spt_pdf_size_bytes', len(pdf_bytes), buckets=SIZE_BUCKETS)
+    return pdf_bytes
+
+def build_spt_report(output, form_data, profile, root_path):
+    # output is either a file path or a writable file object
+    c, logo = open_report_canvas(output, form_data, root_path)
+    draw_report_pages(c, form_data, profile, logo)
     
-    # Set up styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=14,
-        alignment=1,  # Center
-        spaceAfter=10
-    )
+    # Save the PDF
+    with metrics.stage('save'):
+        c.save()
+
+def open_report_canvas(output, form_data, root_path):
+    # Create PDF document with the settings of the chosen output profile;
+    # returns the canvas and the logo to stamp on its sheets. Page streams
+    # are always compressed, which costs nothing in quality.
+    settings = output_profile(form_data)
+    grayscale = bool(form_data.get('escala_cinza'))
+    c = canvas.Canvas(output, pagesize=A4, pageCompression=1,
+                      enforceColorSpace=to_grayscale if grayscale else None)
+    set_metadata(c, form_data, settings['metadata'])
+    
+    # The logo is decoded (and downsampled) once per process and shared
+    logo = resources.logo(root_path, settings['logo_dpi'], grayscale)
+    return c, logo
+
+def set_metadata(c, form_data, enabled):
+    # Document information shown by PDF viewers; without it every field is
+    # written empty instead of ReportLab's placeholders
+    if enabled:
+        c.setTitle(f"Laudo SPT {form_data.get('laudo_numero') or ''}".strip())
+        c.setSubject(" - ".join(text for text in (
+            f"SPT {form_data.get('spt_numero')}" if form_data.get('spt_numero') else '',
+            form_data.get('obra') or '') if text))
+        c.setAuthor(form_data.get('empresa') or '')
+        c.setCreator('SondagemSPT')
+    else:
+        for setter in (c.setTitle, c.setSubject, c.setAuthor, c.setCreator, c.setProducer, c.setKeywords):
+            setter('')
+
+def draw_report_pages(c, form_data, profile, logo):
+    # Every sheet of one borehole, plus the optional pile capacity annex.
+    # The frame form and the logo image belong to the canvas, so boreholes
+    # drawn on the same canvas reference the copies embedded by the first.
+    width, height = A4
     
     # Remove limite_sondagem and profundidade_atingida from form_data if present
     if 'limite_sondagem' in form_data:
@@ -35,42 +103,94 @@ def generate_spt_report(form_data, soil_layers, spt_data):
     if 'profundidade_atingida' in form_data:
         del form_data['profundidade_atingida']
     
-    # Draw border
-    c.rect(10*mm, 10*mm, width-20*mm, height-20*mm, stroke=1, fill=0)
-    
-    # Remove header section completely
-    # draw_header(c, width, height, form_data)
+    # Compute every position once; deep boreholes can be split over several
+    # sheets at a fixed vertical scale (metros_por_folha)
+    with metrics.stage('layout'):
+        layout = ReportLayout(width, height, form_data, profile, form_data.get('metros_por_folha'))
     
-    # Draw main content - adjust y position since header is removed
-    draw_content(c, width, height, form_data, soil_layers, spt_data)
-    
-    # Draw footer
-    draw_footer(c, width, height, form_data)
-    
-    # Save the PDF
-    c.save()
-    
-    return filename
+    for number in range(layout.num_pages):
+        with metrics.stage('layout'):
+            page = layout.page(number)
+        
+        # Stamp the static skeleton (border, table headers, grid, footer table)
+        with metrics.stage('draw_frame'):
+            draw_frame(c, width, height)
+        
+        # Remove header section completely
+        # draw_header(c, width, height, form_data)
+        
+        # Draw main content - adjust y position since header is removed
+        draw_content(c, page)
+        
+        # Draw footer
+        with metrics.stage('draw_footer'):
+            draw_footer(c, layout, page, logo)
+        
+        # Finish the sheet before laying out the next one
+        with metrics.stage('show_page'):
+            c.showPage()
+    
+    # Optional annex with the pile capacity grid
+    if form_data.get('capacidade_estacas'):
+        with metrics.stage('draw_pile_capacity'):
+            draw_pile_capacity_pages(c, layout, form_data, profile, logo)
+
+def to_grayscale(color):
+    # enforceColorSpace hook of the grayscale output: every fill and stroke
+    # colour is replaced by its luminance
+    color = toColor(color)
+    value = 0.299 * color.red + 0.587 * color.green + 0.114 * color.blue
+    return Color(value, value, value, alpha=color.alpha)
 
 # Remove or comment out the draw_header function since we're not using it
 # def draw_header(c, width, height, form_data):
 #     ...
 
-def draw_content(c, width, height, form_data, soil_layers, spt_data):
-    # Draw the main content with soil layers and SPT data
-    # Move content up since header is removed
-    y_content_start = height - 20*mm  # Adjusted from 50*mm to 20*mm
-    content_height = 190*mm  # Increased height since header is removed
-    
-    # Define column widths
-    x_start = 15*mm
-    content_width = width - 30*mm
-    
-    # Column widths based on the example
-    col1_width = content_width * 0.35  # CAMADAS DETECTADAS (left)
-    col2_width = content_width * 0.10  # ESCALA DAS COTAS
-    col3_width = content_width * 0.05  # AMOSTRA REVESTIDA
-    col4_width = content_width * 0.50  # CAMADAS DETECTADAS (right with SPT chart)
+class FrameRecorder:
+    # Stands in for a canvas and records every call made on it, so the
+    # static frame can be computed once and replayed into any document
+    def __init__(self):
+        self.ops = []
+    
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.ops.append((name, args, kwargs))
+        return record
+
+@lru_cache(maxsize=None)
+def build_frame_ops(width, height):
+    # The skeleton only depends on the page size, so it is built once per process
+    recorder = FrameRecorder()
+    draw_static_frame(recorder, width, height)
+    return tuple(recorder.ops)
+
+def draw_frame(c, width, height):
+    # ReportLab forms belong to a document: define the form the first time it is
+    # needed in this canvas and reference it from every page afterwards
+    if not c.hasForm(FRAME_FORM_NAME):
+        c.beginForm(FRAME_FORM_NAME)
+        for name, args, kwargs in build_frame_ops(width, height):
+            getattr(c, name)(*args, **kwargs)
+        c.endForm()
+    c.doForm(FRAME_FORM_NAME)
+
+def draw_static_frame(c, width, height):
+    # Draw border
+    c.rect(10*mm, 10*mm, width-20*mm, height-20*mm, stroke=1, fill=0)
+    
+    draw_content_frame(c, width, height)
+    draw_footer_frame(c, width, height)
+
+def draw_content_frame(c, width, height):
+    g = page_geometry(width, height)
+    x_start = g['x_start']
+    y_content_start = g['y_content_start']
+    content_height = g['content_height']
+    content_width = g['content_width']
+    col1_width = g['col1_width']
+    col2_width = g['col2_width']
+    col3_width = g['col3_width']
+    col4_width = g['col4_width']
     
     # Draw main content box
     c.rect(x_start, y_content_start - content_height, content_width, content_height, stroke=1, fill=0)
@@ -131,7 +251,7 @@ def draw_content(c, width, height, form_data, soil_layers, spt_data):
     c.drawCentredString(x_start + col1_width + col2_width + col3_width + col4_width/2, y_content_start - 5*mm, "GOLPES P/30cm")
     
     # Draw horizontal line for INICIAL/FINAL subheaders
-    y_subheader2 = y_content_start - 12*mm
+    y_subheader2 = g['y_subheader2']
     c.line(x_start + col1_width + col2_width + col3_width, y_subheader2, x_start + content_width, y_subheader2)
     
     # Draw INICIAL/FINAL subheaders
@@ -151,30 +271,33 @@ def draw_content(c, width, height, form_data, soil_layers, spt_data):
            x_start + col1_width + col2_width + col3_width + subcol4_width, y_content_start - content_height)
     
     # Draw horizontal line below all subheaders
-    y_content_start_actual = y_subheader2 - 8*mm
-    c.line(x_start, y_content_start_actual, x_start + content_width, y_content_start_actual)
-    
-    # Calculate space for observations at the bottom of the content area
-    obs_height = 25*mm
-    y_obs = y_content_start - content_height + obs_height  # Position observations inside the main content box
-    
-    # Draw observations as part of the main content
-    draw_observations(c, x_start, y_obs, content_width, obs_height, form_data, spt_data, soil_layers)
+    c.line(x_start, g['y_data'], x_start + content_width, g['y_data'])
     
-    # Adjust content height for the main sections to account for observations
-    adjusted_content_height = content_height - obs_height
+    # Observations title, the observation lines themselves depend on the data
+    c.setFont("Helvetica-Bold", 8)
+    c.drawString(x_start + 5*mm, g['y_obs'] - 5*mm, "Observação:")
     
     # Draw SPT chart grid
-    draw_spt_chart_grid(c, x_start + col1_width + col2_width + col3_width, y_content_start_actual, col4_width, adjusted_content_height - (y_content_start - y_content_start_actual))
+    draw_spt_chart_grid(c, x_start + col1_width + col2_width + col3_width, g['y_data'], col4_width, g['data_height'])
+
+def draw_content(c, page):
+    # Draw the variable layers of the main content on top of the frame
+    
+    # Draw observations as part of the main content
+    with metrics.stage('draw_observations'):
+        draw_observations(c, page)
     
     # Draw soil layers
-    draw_soil_layers(c, x_start, y_content_start_actual, col1_width, adjusted_content_height - (y_content_start - y_content_start_actual), soil_layers, spt_data)
+    with metrics.stage('draw_soil_layers'):
+        draw_soil_layers(c, page)
     
     # Draw depth scale
-    draw_depth_scale(c, x_start + col1_width, y_content_start_actual, col2_width, adjusted_content_height - (y_content_start - y_content_start_actual), soil_layers, spt_data)
+    with metrics.stage('draw_depth_scale'):
+        draw_depth_scale(c, page)
     
     # Draw SPT data points and lines
-    draw_spt_data(c, x_start + col1_width + col2_width + col3_width, y_content_start_actual, col4_width, adjusted_content_height - (y_content_start - y_content_start_actual), spt_data)
+    with metrics.stage('draw_spt_data'):
+        draw_spt_data(c, page)
 
 # Add the missing function
 def draw_spt_chart_grid(c, x, y, width, height):
@@ -202,61 +325,33 @@ def draw_spt_chart_grid(c, x, y, width, height):
         y_pos = y - i * 10*mm
         c.line(x, y_pos, x + grid_width, y_pos)
 
-def draw_observations(c, x, y, width, height, form_data, spt_data, soil_layers):
+def draw_observations(c, page):
     # Draw observations directly in the main content area
-    # No need for a separate box
+    # No need for a separate box, the title is part of the static frame
+    if not page.observations:
+        return
     
-    # Draw title
     c.setFont("Helvetica-Bold", 8)
-    c.drawString(x + 5*mm, y - 5*mm, "Observação:")
-    
-    # Calculate limite de sondagem and profundidade atingida from soil layers
-    max_depth = 0
-    if soil_layers:
-        max_depth = max([float(layer.get('end_depth', 0)) for layer in soil_layers])
-    
-    # Standard observations
-    observations = [
-        f"- Limite de sondagem ao S.P.T.: {max_depth}m",
-        f"- Profundidade atingida: {max_depth}m"
-    ]
-    
-    # Add water level observation if present
-    water_level_data = next((data for data in spt_data if data.get('has_water_level', False)), None)
-    if water_level_data:
-        observations.append(f"- Água com {water_level_data.get('depth', '')}m de profundidade")
-    
-    # Draw each observation
-    for i, obs in enumerate(observations):
-        c.drawString(x + 5*mm, y - 10*mm - i*5*mm, obs)
+    for x, y, text in page.observations:
+        c.drawString(x, y, text)
 
-def draw_footer(c, width, height, form_data):
-    # Calculate the position based on the content area
-    # This should be right after the main content area ends
-    footer_y = 30*mm  # This is the position from the bottom of the page
+def draw_footer_frame(c, width, height):
+    g = page_geometry(width, height)
+    footer_y = g['footer_y']  # This is the position from the bottom of the page
     
     # Draw title at the bottom with minimal space
     c.setFont("Helvetica-Bold", 10)  # Reduced from 12
     c.drawCentredString(width/2, footer_y + 15*mm, "PERFIL GEOTÉCNICO")  # Moved up
     
     # Draw detailed footer table
-    table_width = width - 30*mm
-    table_height = 25*mm
-    table_x = 15*mm
+    table_width = g['table_width']
+    table_height = g['table_height']
+    table_x = g['table_x']
     table_y = footer_y  # Adjusted to be closer to the title
     
     # Draw main table outline
     c.rect(table_x, table_y, table_width, table_height, stroke=1, fill=0)
     
-    # Try to load company logo
-    try:
-        logo_path = os.path.join(current_app.root_path, 'static', 'img', 'company_logo.png')
-        if os.path.exists(logo_path):
-            c.drawImage(logo_path, table_x + 2*mm, table_y + 5*mm, width=25*mm, height=15*mm)
-    except:
-        # If logo loading fails, just continue without it
-        pass
-    
     # Draw horizontal dividers - create multiple rows
     num_rows = 5
     row_height = table_height / num_rows
@@ -268,190 +363,204 @@ def draw_footer(c, width, height, form_data):
     for i in range(1, 3):
         c.line(table_x + i*col_width, table_y, table_x + i*col_width, table_y + table_height)
     
-    # Draw company info
+    # Draw company info and signature labels
     c.setFont("Helvetica", 7)
     c.drawString(table_x + col_width + 5*mm, table_y + table_height - 5*mm, "EMPRESA:")
-    c.drawString(table_x + col_width + 5*mm, table_y + table_height - 10*mm, form_data.get('empresa', ''))
-    
     c.drawString(table_x + col_width + 5*mm, table_y + table_height - 15*mm, "ENDEREÇO:")
-    c.drawString(table_x + col_width + 5*mm, table_y + table_height - 20*mm, form_data.get('endereco_empresa', ''))
-    
-    # Draw signatures
     c.drawString(table_x + 2*col_width + 5*mm, table_y + table_height - 5*mm, "RESPONSÁVEL TÉCNICO:")
-    c.drawString(table_x + 2*col_width + 5*mm, table_y + table_height - 10*mm, form_data.get('responsavel_tecnico', ''))
-    
     c.drawString(table_x + 2*col_width + 5*mm, table_y + table_height - 15*mm, "CREA:")
-    c.drawString(table_x + 2*col_width + 5*mm, table_y + table_height - 20*mm, form_data.get('crea', ''))
 
-def draw_spt_data(c, x, y, width, height, spt_data):
-    # Calculate total depth for scaling
-    max_depth = 0
-    if spt_data:
-        max_depth = max([float(data.get('depth', 0)) for data in spt_data])
-    
-    if max_depth == 0:
-        max_depth = 15  # Default if no data
+def draw_footer(c, layout, page, logo):
+    # Draw the per-report values of the footer table on top of the frame
+    g = layout.geometry
     
-    # Calculate scale factor
-    scale = height / max_depth
-    
-    # Calculate horizontal scale for SPT values
-    # Assuming SPT values range from 0 to 50
-    h_scale = width / 50
-    
-    # Sort data by depth
-    sorted_data = sorted(spt_data, key=lambda d: float(d.get('depth', 0)))
+    # Company logo, decoded once by the resource registry (None if missing or broken)
+    if logo is not None:
+        c.drawImage(logo, g['table_x'] + 2*mm, g['footer_y'] + 5*mm, width=25*mm, height=15*mm)
     
+    # Draw company info and signatures
+    c.setFont("Helvetica", 7)
+    for x, y, text in layout.footer_texts:
+        c.drawString(x, y, text)
+    
+    # Sheet counter in the bottom row of the footer's first column
+    if page is not None and page.sheet_label:
+        x, y, text = page.sheet_label
+        c.setFont("Helvetica", 6)
+        c.drawString(x, y, text)
+
+def draw_spt_data(c, page):
     # Draw SPT data points and lines
-    if len(sorted_data) > 0:
-        # Prepare points for initial and final values
-        initial_points = []
-        final_points = []
-        
-        for data in sorted_data:
-            depth = float(data.get('depth', 0))
-            # Use the correct property names from your SPT data model
-            initial = int(data.get('golpes_inicial', 0))
-            final = int(data.get('golpes_final', 0))
-            
-            # Calculate positions
-            y_pos = y - depth * scale
-            x_initial = x + initial * h_scale
-            x_final = x + final * h_scale
-            
-            # Store points for lines
-            initial_points.append((x_initial, y_pos))
-            final_points.append((x_final, y_pos))
-            
-            # Draw data points
-            c.setFillColorRGB(1, 0, 0)  # Red for initial
-            c.circle(x_initial, y_pos, 1.5*mm, fill=1)
-            
-            c.setFillColorRGB(0, 0, 1)  # Blue for final
-            c.circle(x_final, y_pos, 1.5*mm, fill=1)
-            
-            # Draw values next to points
-            c.setFont("Helvetica", 6)
-            c.setFillColorRGB(1, 0, 0)  # Red for initial
-            c.drawString(x_initial + 2*mm, y_pos, str(initial))
-            
-            c.setFillColorRGB(0, 0, 1)  # Blue for final
-            c.drawString(x_final + 2*mm, y_pos, str(final))
-        
-        # Draw lines connecting points
-        c.setFillColorRGB(0, 0, 0)  # Reset fill color
-        
-        # Draw initial line (red)
-        c.setStrokeColorRGB(1, 0, 0)  # Red
-        c.setLineWidth(0.5)
-        
-        for i in range(len(initial_points) - 1):
-            c.line(initial_points[i][0], initial_points[i][1], 
-                   initial_points[i+1][0], initial_points[i+1][1])
+    if not page.initial_points:
+        return
+    
+    # Curves crossing a page break are clipped to the chart box
+    if page.clip:
+        c.saveState()
+        clip = c.beginPath()
+        clip.rect(*page.clip)
+        c.clipPath(clip, stroke=0, fill=0)
+    
+    # Red for initial, blue for final
+    series = (
+        ((1, 0, 0), page.initial_markers, page.initial_points),
+        ((0, 0, 1), page.final_markers, page.final_points),
+    )
+    
+    # Draw data points, one path per series so the fill color changes only twice
+    for color, markers, _ in series:
+        if markers:
+            c.setFillColorRGB(*color)
+            dots = c.beginPath()
+            for x, y, _ in markers:
+                dots.circle(x, y, 1.5*mm)
+            c.drawPath(dots, stroke=1, fill=1)
+    
+    # Draw values next to points, one text object per series
+    for color, markers, _ in series:
+        if markers:
+            labels = c.beginText()
+            labels.setFont("Helvetica", 6)
+            labels.setFillColorRGB(*color)
+            for x, y, blows in markers:
+                labels.setTextOrigin(x + 2*mm, y)
+                labels.textOut(str(blows))
+            c.drawText(labels)
+    
+    # Draw lines connecting points
+    c.setFillColorRGB(0, 0, 0)  # Reset fill color
+    c.setLineWidth(0.5)
+    
+    # Each curve is a single polyline
+    for color, _, points in series:
+        c.setStrokeColorRGB(*color)
+        curve = c.beginPath()
+        curve.moveTo(*points[0])
+        for point in points[1:]:
+            curve.lineTo(*point)
+        c.drawPath(curve, stroke=1, fill=0)
+    
+    # Reset stroke color
+    c.setStrokeColorRGB(0, 0, 0)
+    c.setLineWidth(1)
+    
+    if page.clip:
+        c.restoreState()
+
+def draw_soil_layers(c, page):
+    # Draw depth markers
+    c.setFont("Helvetica-Bold", 7)
+    for x, y, text in page.layer_labels:
+        c.drawString(x, y, text)
+    
+    # Draw layer descriptions; thin layers may use a smaller size
+    current_size = None
+    for x, y, text, size in page.description_lines:
+        if size != current_size:
+            c.setFont(DESCRIPTION_FONT, size)
+            current_size = size
+        c.drawString(x, y, text)
+    
+    # Draw water level if present
+    if page.water:
+        x1, x2, water_y, label_x, label_y, text = page.water
         
-        # Draw final line (blue)
+        # Draw water level line
         c.setStrokeColorRGB(0, 0, 1)  # Blue
+        c.setDash([2, 2], 0)
+        c.line(x1, water_y, x2, water_y)
         
-        for i in range(len(final_points) - 1):
-            c.line(final_points[i][0], final_points[i][1], 
-                   final_points[i+1][0], final_points[i+1][1])
+        # Draw water level text
+        c.setFont("Helvetica", 6)
+        c.setFillColorRGB(0, 0, 1)  # Blue
+        c.drawString(label_x, label_y, text)
         
-        # Reset stroke color
+        # Reset colors and dash
         c.setStrokeColorRGB(0, 0, 0)
-        c.setLineWidth(1)
+        c.setFillColorRGB(0, 0, 0)
+        c.setDash([], 0)
 
-def draw_soil_layers(c, x, y, width, height, soil_layers, spt_data):
-    # Calculate total depth for scaling
-    max_depth = 0
-    if soil_layers:
-        max_depth = max([float(layer.get('end_depth', 0)) for layer in soil_layers])
-    
-    if max_depth == 0:
-        max_depth = 15  # Default if no data
-    
-    # Calculate scale factor
-    scale = height / max_depth
-    
-    # Draw soil layers
-    c.setFont("Helvetica", 7)
-    
-    for layer in soil_layers:
-        start_depth = float(layer.get('start_depth', 0))
-        end_depth = float(layer.get('end_depth', 0))
-        description = layer.get('description', '')
-        
-        # Calculate y positions
-        y_start = y - start_depth * scale
-        y_end = y - end_depth * scale
-        
-        # Draw depth marker
-        c.setFont("Helvetica-Bold", 7)
-        c.drawString(x + 2*mm, y_start - 3*mm, f"{start_depth:.2f}")
-        
-        # Draw layer description
-        c.setFont("Helvetica", 7)
-        
-        # Split description into lines if too long
-        max_chars_per_line = 30
-        words = description.split()
-        lines = []
-        current_line = ""
-        
-        for word in words:
-            if len(current_line + " " + word) <= max_chars_per_line:
-                current_line += " " + word if current_line else word
-            else:
-                lines.append(current_line)
-                current_line = word
-        
-        if current_line:
-            lines.append(current_line)
-        
-        # Draw each line of the description
-        for i, line in enumerate(lines):
-            c.drawString(x + 10*mm, y_start - 3*mm - i*4*mm, line)
-        
-        # Draw water level if present
-        water_level_data = next((data for data in spt_data if data.get('has_water_level', False)), None)
-        if water_level_data:
-            water_depth = float(water_level_data.get('depth', 0))
-            water_y = y - water_depth * scale
-            
-            # Draw water level line
-            c.setStrokeColorRGB(0, 0, 1)  # Blue
-            c.setDash([2, 2], 0)
-            c.line(x, water_y, x + width, water_y)
-            
-            # Draw water level text
-            c.setFont("Helvetica", 6)
-            c.setFillColorRGB(0, 0, 1)  # Blue
-            c.drawString(x + 2*mm, water_y - 3*mm, f"ÁGUA {water_depth:.2f}m")
-            
-            # Reset colors and dash
-            c.setStrokeColorRGB(0, 0, 0)
-            c.setFillColorRGB(0, 0, 0)
-            c.setDash([], 0)
-
-def draw_depth_scale(c, x, y, width, height, soil_layers, spt_data):
-    # Calculate total depth for scaling
-    max_depth = 0
-    if soil_layers:
-        max_depth = max([float(layer.get('end_depth', 0)) for layer in soil_layers])
-    
-    if max_depth == 0:
-        max_depth = 15  # Default if no data
-    
-    # Calculate scale factor
-    scale = height / max_depth
-    
+def draw_depth_scale(c, page):
     # Draw depth markers every meter
     c.setFont("Helvetica", 7)
     
-    for depth in range(int(max_depth) + 1):
-        y_pos = y - depth * scale
-        
+    for x1, x2, y_pos, label_x, label_y, text in page.depth_ticks:
         # Draw horizontal line
-        c.line(x, y_pos, x + width, y_pos)
+        c.line(x1, y_pos, x2, y_pos)
         
         # Draw depth value
-        c.drawCentredString(x + width/2, y_pos - 3*mm, str(depth))
\ No newline at end of file
+        c.drawCentredString(label_x, label_y, text)
+
+def draw_pile_capacity_pages(c, layout, form_data, profile, logo):
+    # Annex sheets: admissible load (kN) per pile type, tip depth (rows) and
+    # diameter (columns), Aoki-Velloso / Décourt-Quaresma side by side
+    options = form_data['capacidade_estacas']
+    rows = pile_capacity(profile, options)
+    if not rows:
+        return
+    
+    loads = {}
+    for row in rows:
+        loads[(row['tipo'], row['profundidade'], row['diametro'], row['metodo'])] = row['carga_admissivel']
+    tip_depths = sorted({row['profundidade'] for row in rows})
+    diameters = options['diametros']
+    methods = options['metodos']
+    
+    width, height = layout.width, layout.height
+    g = layout.geometry
+    x = g['x_start']
+    table_width = g['content_width']
+    depth_col = 18*mm
+    col_width = (table_width - depth_col) / len(diameters)
+    row_height = 4.5*mm
+    top = g['y_content_start'] + 5*mm
+    bottom = g['footer_y'] + g['table_height'] + 22*mm
+    
+    def start_sheet():
+        c.rect(10*mm, 10*mm, width-20*mm, height-20*mm, stroke=1, fill=0)
+        draw_footer_frame(c, width, height)
+        draw_footer(c, layout, None, logo)
+        c.setFont("Helvetica-Bold", 10)
+        c.drawCentredString(width/2, top, "ANEXO - CAPACIDADE DE CARGA DE ESTACAS")
+        c.setFont("Helvetica", 6)
+        notes = [
+            "Carga admissível em kN. Aoki-Velloso (AV): ruptura / %.1f. "
+            "Décourt-Quaresma (DQ): lateral / %.1f + ponta / %.1f." % ((AOKI_VELLOSO_SAFETY,) + DECOURT_SAFETY),
+            "NSPT por metro a partir dos golpes FINAL (limitado a 50); solo de cada metro pela classificação da camada.",
+        ]
+        for i, note in enumerate(notes):
+            c.drawString(x, bottom - 8*mm - i*3.5*mm, note)
+        return top - 8*mm
+    
+    def table_header(y, pile_type):
+        c.setFont("Helvetica-Bold", 8)
+        c.drawString(x, y, f"Estaca {PILE_TYPES[pile_type]['label']}")
+        y -= row_height
+        c.setFont("Helvetica-Bold", 6)
+        c.rect(x, y - 1.5*mm, table_width, row_height, stroke=1, fill=0)
+        c.drawCentredString(x + depth_col/2, y, "PROF. (m)")
+        for i, diameter in enumerate(diameters):
+            label = f"Ø {diameter * 100:.0f} cm" + ("  (AV / DQ)" if len(methods) > 1 else "")
+            c.drawCentredString(x + depth_col + (i + 0.5)*col_width, y, label)
+        return y - row_height
+    
+    y = start_sheet()
+    for pile_type in options['tipos']:
+        # Keep the title, the header and at least a few rows together
+        if y - 4*row_height < bottom:
+            c.showPage()
+            y = start_sheet()
+        y = table_header(y, pile_type)
+        c.setFont("Helvetica", 6)
+        for depth in tip_depths:
+            if y < bottom:
+                c.showPage()
+                y = table_header(start_sheet(), pile_type)
+                c.setFont("Helvetica", 6)
+            c.drawCentredString(x + depth_col/2, y, f"{depth:.0f}")
+            for i, diameter in enumerate(diameters):
+                values = " / ".join(f"{loads[(pile_type, depth, diameter, method)]:.0f}" for method in methods)
+                c.drawCentredString(x + depth_col + (i + 0.5)*col_width, y, values)
+            y -= row_height
+        y -= row_height
+    c.showPage()
@@ -0,0 +1,103 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from services.pdf_generator import render_spt_report, report_filename
+from services.report_cache import payload_key, report_cache
+
+class JobQueueFull(Exception):
+    pass
+
+class PdfJobQueue:
+    # Renders PDFs on a bounded pool of worker threads so request handlers can
+    # return a job id immediately; identical in-flight payloads share one job
+    def __init__(self, max_workers=4, max_pending=64, max_finished=256):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.executor = None
+        self.jobs = OrderedDict()
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pdf-job')
+        return self.executor
+
+    def submit(self, root_path, form_data, profile):
+        key = payload_key(form_data, profile)
+        with self.lock:
+            # Coalesce with a job that is already queued or running
+            job_id = self.inflight.get(key)
+            if job_id is not None:
+                return self.jobs[job_id]
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'key': key,
+                'status': 'queued',
+                'filename': report_filename(form_data),
+                'error': None,
+                'pdf': None,
+                'created': time.time(),
+                'finished': None,
+            }
+
+            # Already rendered: the job is born finished
+            cached = report_cache.get(key)
+            if cached is not None:
+                job['filename'], job['pdf'] = cached
+                job['status'] = 'done'
+                job['finished'] = time.time()
+                self.jobs[job['id']] = job
+                self.prune()
+                return job
+
+            if len(self.inflight) >= self.max_pending:
+                raise JobQueueFull('Fila de geração de PDF cheia, tente novamente em instantes')
+
+            self.jobs[job['id']] = job
+            self.inflight[key] = job['id']
+
+        self.get_executor().submit(self.run, job, root_path, form_data, profile)
+        return job
+
+    def run(self, job, root_path, form_data, profile):
+        job['status'] = 'running'
+        try:
+            pdf_bytes = render_spt_report(form_data, profile, root_path=root_path)
+            report_cache.put(job['key'], job['filename'], pdf_bytes)
+            job['pdf'] = pdf_bytes
+            job['status'] = 'done'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            job['finished'] = time.time()
+            with self.lock:
+                self.inflight.pop(job['key'], None)
+                self.prune()
+
+    def prune(self):
+        # Forget the oldest finished jobs once over the limit (lock must be held)
+        finished = [job_id for job_id, job in self.jobs.items() if job['finished'] is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+def job_status(job):
+    # Public view of a job, without the rendered bytes
+    return {
+        'jobId': job['id'],
+        'status': job['status'],
+        'filename': job['filename'],
+        'error': job['error'],
+    }
+
+# Process-wide queue used by the Flask routes
+pdf_jobs = PdfJobQueue()
@@ -0,0 +1,194 @@
+import os
+import time
+import uuid
+import hashlib
+import threading
+
+# Defaults for the on-disk cap; the app can override them from its config
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+DEFAULT_SWEEP_INTERVAL = 300
+
+# Leftover temp files from a crashed write are removed after this many seconds
+TEMP_MAX_AGE = 3600
+TEMP_PREFIX = '.tmp-'
+
+class PdfStore:
+    # Directory of generated PDFs. Writes go to a temp file renamed into place,
+    # so readers and concurrent writers never see a partial file. Identical
+    # content is not written twice: a repeated report only refreshes the file's
+    # mtime, and the same content under a new name is hard-linked. Content is
+    # identified by the caller's digest (the payload key for laudos, since
+    # ReportLab stamps a creation date and ID into every PDF) or by the bytes. The mtime
+    # doubles as the last-use time, so the sweeper can evict LRU-first and
+    # works across worker processes sharing the directory.
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE,
+                 sweep_interval=DEFAULT_SWEEP_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self.files = {}    # filename -> (digest, size, mtime_ns) written by this process
+        self.digests = {}  # digest -> filename
+        self.lock = threading.Lock()
+        self.sweeper = None
+        self.sweeper_pid = None
+        self.stopped = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, filename):
+        # Only plain names are stored, never paths outside the directory
+        if os.path.basename(filename) != filename or filename.startswith('.'):
+            raise ValueError(f"Nome de arquivo inválido ({filename!r})")
+        return os.path.join(self.directory, filename)
+
+    def known(self, filename, digest=None):
+        # Entry written by this process that is still on disk, unchanged
+        entry = self.files.get(filename)
+        if entry is None or (digest is not None and entry[0] != digest):
+            return None
+        try:
+            stat = os.stat(self.path(filename))
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != entry[1:]:
+            return None
+        return entry
+
+    def save(self, filename, pdf_bytes, digest=None):
+        path = self.path(filename)
+        if digest is None:
+            digest = hashlib.sha256(pdf_bytes).hexdigest()
+
+        with self.lock:
+            unchanged = self.known(filename, digest) is not None
+            source = self.digests.get(digest)
+            if source is not None and not self.known(source, digest):
+                source = None
+        if unchanged:
+            self.touch(filename)
+            return filename
+
+        tmp_path = os.path.join(self.directory, f"{TEMP_PREFIX}{uuid.uuid4().hex}")
+        try:
+            linked = False
+            if source is not None:
+                try:
+                    os.link(self.path(source), tmp_path)
+                    linked = True
+                except OSError:
+                    pass
+            if not linked:
+                with open(tmp_path, 'wb') as f:
+                    f.write(pdf_bytes)
+            os.replace(tmp_path, path)
+            if linked:
+                # A fresh mtime marks the shared inode as recently used
+                os.utime(path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        stat = os.stat(path)
+        with self.lock:
+            self.files[filename] = (digest, stat.st_size, stat.st_mtime_ns)
+            self.digests[digest] = filename
+        return filename
+
+    def touch(self, filename):
+        # Mark a file as used (download or dedupe hit); missing files are ignored
+        try:
+            path = self.path(filename)
+            os.utime(path)
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            entry = self.files.get(filename)
+            if entry is not None:
+                self.files[filename] = (entry[0], stat.st_size, stat.st_mtime_ns)
+
+    def sweep(self):
+        # Remove files older than max_age, then the least recently used ones
+        # until the directory is under max_bytes. Returns the removed names.
+        now = time.time()
+        files = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return []
+        for entry in entries:
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if entry.name.startswith(TEMP_PREFIX):
+                if now - stat.st_mtime > TEMP_MAX_AGE:
+                    self.remove(entry.name)
+                continue
+            if entry.name.endswith('.pdf'):
+                files.append((stat.st_mtime, stat.st_size, entry.name))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = []
+        for mtime, size, name in files:
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            if self.remove(name):
+                removed.append(name)
+                total -= size
+        return removed
+
+    def remove(self, filename):
+        try:
+            os.remove(os.path.join(self.directory, filename))
+        except OSError:
+            return False
+        with self.lock:
+            entry = self.files.pop(filename, None)
+            if entry is not None and self.digests.get(entry[0]) == filename:
+                del self.digests[entry[0]]
+        return True
+
+    def start_sweeper(self):
+        # Background thread running sweep() every sweep_interval seconds.
+        # Threads do not survive fork(), so a worker forked from a preloaded
+        # app starts its own on its first call; later calls return at once.
+        if self.sweeper_pid == os.getpid():
+            return
+        with self.lock:
+            if self.sweeper_pid == os.getpid():
+                return
+            self.sweeper = threading.Thread(target=self.run_sweeper, name='pdf-store-sweeper', daemon=True)
+            self.sweeper.start()
+            self.sweeper_pid = os.getpid()
+
+    def run_sweeper(self):
+        while not self.stopped.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception:
+                import traceback
+                print(traceback.format_exc())
+
+    def stop_sweeper(self):
+        self.stopped.set()
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_pdf_store(root_path, **options):
+    # One store per static/pdfs directory and process; the directory is
+    # created here, once, instead of on every request
+    directory = os.path.join(root_path, 'static', 'pdfs')
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = _stores[directory] = PdfStore(directory, **options)
+        return store
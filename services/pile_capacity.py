@@ -0,0 +1,234 @@
+import math
+import unicodedata
+from bisect import bisect_left
+
+# NSPT values above this are taken as 50 (impenetrable for both methods)
+MAX_NSPT = 50
+
+# Grid sizes accepted by the API and the laudo table
+MAX_GRID_COMBINATIONS = 20000
+
+# Pile types: label, Aoki-Velloso (F1, F2) and Décourt-Quaresma category
+PILE_TYPES = {
+    'franki': {'label': 'Franki', 'av': (2.50, 5.0), 'dq': 'cravada'},
+    'metalica': {'label': 'Metálica', 'av': (1.75, 3.5), 'dq': 'cravada'},
+    'pre_moldada': {'label': 'Pré-moldada', 'av': (1.75, 3.5), 'dq': 'cravada'},
+    'escavada': {'label': 'Escavada', 'av': (3.00, 6.0), 'dq': 'escavada'},
+    'helice_continua': {'label': 'Hélice contínua', 'av': (2.00, 4.0), 'dq': 'helice_continua'},
+    'raiz': {'label': 'Raiz', 'av': (2.00, 4.0), 'dq': 'raiz'},
+}
+
+# Aoki-Velloso soil coefficients: (main soil, modifiers) -> (K in kPa, alpha)
+AOKI_VELLOSO_SOILS = {
+    ('areia', ()): (1000, 0.014),
+    ('areia', ('silte',)): (800, 0.020),
+    ('areia', ('silte', 'argila')): (700, 0.024),
+    ('areia', ('argila',)): (600, 0.030),
+    ('areia', ('argila', 'silte')): (500, 0.028),
+    ('silte', ()): (400, 0.030),
+    ('silte', ('areia',)): (550, 0.022),
+    ('silte', ('areia', 'argila')): (450, 0.028),
+    ('silte', ('argila',)): (230, 0.034),
+    ('silte', ('argila', 'areia')): (250, 0.030),
+    ('argila', ()): (200, 0.060),
+    ('argila', ('areia',)): (350, 0.024),
+    ('argila', ('areia', 'silte')): (300, 0.028),
+    ('argila', ('silte',)): (220, 0.040),
+    ('argila', ('silte', 'areia')): (330, 0.030),
+}
+
+# Décourt-Quaresma tip coefficient C (kPa) by soil
+DECOURT_C = {
+    ('argila', ()): 120,
+    ('silte', ('argila',)): 200,
+    ('silte', ()): 200,
+    ('silte', ('areia',)): 250,
+    ('areia', ()): 400,
+}
+
+# Décourt (1996) alpha (tip) and beta (shaft) by category: (argila, silte, areia)
+DECOURT_ALPHA = {
+    'cravada': (1.00, 1.00, 1.00),
+    'escavada': (0.85, 0.60, 0.50),
+    'helice_continua': (0.30, 0.30, 0.30),
+    'raiz': (0.85, 0.60, 0.50),
+}
+DECOURT_BETA = {
+    'cravada': (1.00, 1.00, 1.00),
+    'escavada': (0.80, 0.65, 0.50),
+    'helice_continua': (1.00, 1.00, 1.00),
+    'raiz': (1.50, 1.50, 1.50),
+}
+SOIL_GROUPS = ('argila', 'silte', 'areia')
+
+# Safety factors: global for Aoki-Velloso, partial (shaft, tip) for Décourt-Quaresma
+AOKI_VELLOSO_SAFETY = 2.0
+DECOURT_SAFETY = (1.3, 4.0)
+
+METHODS = ('aoki_velloso', 'decourt_quaresma')
+
+DEFAULT_DIAMETERS = (0.25, 0.30, 0.40, 0.50, 0.60, 0.70, 0.80)
+
+SOIL_WORDS = (('areia', 'areia'), ('aren', 'areia'), ('silt', 'silte'), ('argil', 'argila'))
+
+def classify_soil(description):
+    # "Argila silto-arenosa, mole" -> ('argila', ('silte', 'areia')); the first
+    # soil word is the main fraction, later ones are modifiers in order.
+    # Unknown descriptions fall back to clay, the most conservative choice.
+    text = unicodedata.normalize('NFKD', description or '').encode('ascii', 'ignore').decode('ascii').lower()
+    found = []
+    for word in text.replace('-', ' ').replace(',', ' ').split():
+        for prefix, soil in SOIL_WORDS:
+            if word.startswith(prefix) and soil not in found:
+                found.append(soil)
+                break
+    if not found:
+        return ('argila', ())
+    return (found[0], tuple(found[1:3]))
+
+def lookup(table, soil):
+    # Most specific entry for the soil, dropping modifiers until one matches
+    main, modifiers = soil
+    while True:
+        value = table.get((main, modifiers))
+        if value is not None:
+            return value
+        if not modifiers:
+            return table[('argila', ())]
+        modifiers = modifiers[:-1]
+
+def metre_profile(profile):
+    # NSPT (FINAL blows, capped at MAX_NSPT) and soil of every metre 1..L of
+    # the borehole. A metre without its own sample takes the value
+    # interpolated between its neighbours.
+    depths = list(profile.depths)
+    blows = list(profile.golpes_final)
+    if not depths:
+        return [], []
+    metres = int(math.floor(depths[-1] + 1e-9))
+    nspt = []
+    soils = []
+    for m in range(1, metres + 1):
+        i = bisect_left(depths, m - 0.5)
+        if i < len(depths) and abs(depths[i] - m) <= 0.5:
+            value = blows[i]
+        elif i == 0:
+            value = blows[0]
+        elif i >= len(depths):
+            value = blows[-1]
+        else:
+            d0, d1 = depths[i - 1], depths[i]
+            value = blows[i - 1] + (blows[i] - blows[i - 1]) * (m - d0) / (d1 - d0)
+        nspt.append(min(float(value), MAX_NSPT))
+
+        # Soil of the layer at the middle of the metre
+        j = bisect_left(profile.layer_ends, m - 0.5)
+        description = profile.descriptions[j] if j < profile.layer_count else (
+            profile.descriptions[-1] if profile.layer_count else '')
+        soils.append(classify_soil(description))
+    return nspt, soils
+
+def prefix_sums(values):
+    sums = [0.0]
+    for value in values:
+        sums.append(sums[-1] + value)
+    return sums
+
+def capacity_grid(profile, pile_types=None, diameters=None, tip_depths=None, methods=METHODS):
+    # Ultimate and admissible loads (kN) for every pile type x diameter x tip
+    # depth x method. The per-metre shaft resistances of each pile type are
+    # accumulated once into prefix sums, so each combination costs O(1).
+    nspt, soils = metre_profile(profile)
+    metres = len(nspt)
+    pile_types = list(pile_types or PILE_TYPES)
+    diameters = list(diameters or DEFAULT_DIAMETERS)
+    if tip_depths is None:
+        tip_depths = range(3, metres + 1)
+    tip_depths = [int(d) for d in tip_depths if 1 <= int(d) <= metres]
+    if len(pile_types) * len(diameters) * len(tip_depths) * len(methods) > MAX_GRID_COMBINATIONS:
+        raise ValueError(f"A grade de estacas aceita no máximo {MAX_GRID_COMBINATIONS} combinações")
+
+    # Soil coefficients per metre, shared by every pile type
+    av_soil = [lookup(AOKI_VELLOSO_SOILS, soil) for soil in soils]
+    dq_c = [lookup(DECOURT_C, soil) for soil in soils]
+    dq_group = [SOIL_GROUPS.index(soil[0]) for soil in soils]
+
+    # Décourt-Quaresma: NSPT at the tip is the mean of the metre above, at and below
+    tip_mean = [sum(nspt[max(0, m - 1):m + 2]) / len(nspt[max(0, m - 1):m + 2]) for m in range(metres)]
+    # Shaft NSPT limited to 3..50
+    shaft_n = [min(max(n, 3.0), MAX_NSPT) for n in nspt]
+
+    rows = []
+    for type_key in pile_types:
+        pile = PILE_TYPES[type_key]
+        f1, f2 = pile['av']
+        alphas = DECOURT_ALPHA[pile['dq']]
+        betas = DECOURT_BETA[pile['dq']]
+
+        # Unit shaft resistance (kPa) of each metre, as prefix sums
+        av_shaft = prefix_sums(alpha * k * n / f2 for (k, alpha), n in zip(av_soil, nspt))
+        dq_shaft = prefix_sums(betas[g] * 10 * (n / 3 + 1) for g, n in zip(dq_group, shaft_n))
+
+        for tip in tip_depths:
+            m = tip - 1  # index of the metre ending at the tip
+            av_tip = av_soil[m][0] * nspt[m] / f1
+            dq_tip = alphas[dq_group[m]] * dq_c[m] * tip_mean[m]
+            # Mean shaft resistance leaves out the two metres used at the tip,
+            # then applies to the full length
+            shaft_metres = tip - 2 if tip > 2 else tip
+            dq_unit_shaft = dq_shaft[shaft_metres] / shaft_metres * tip
+
+            for diameter in diameters:
+                area = math.pi * diameter * diameter / 4
+                perimeter = math.pi * diameter
+                if 'aoki_velloso' in methods:
+                    rl = perimeter * av_shaft[tip]
+                    rp = area * av_tip
+                    rows.append(result_row(type_key, diameter, tip, 'aoki_velloso',
+                                           rl, rp, (rl + rp) / AOKI_VELLOSO_SAFETY))
+                if 'decourt_quaresma' in methods:
+                    rl = perimeter * dq_unit_shaft
+                    rp = area * dq_tip
+                    rows.append(result_row(type_key, diameter, tip, 'decourt_quaresma',
+                                           rl, rp, rl / DECOURT_SAFETY[0] + rp / DECOURT_SAFETY[1]))
+    return rows
+
+def result_row(pile_type, diameter, tip_depth, method, rl, rp, admissible):
+    return {
+        'tipo': pile_type,
+        'diametro': diameter,
+        'profundidade': tip_depth,
+        'metodo': method,
+        'resistencia_lateral': round(rl, 1),
+        'resistencia_ponta': round(rp, 1),
+        'carga_ruptura': round(rl + rp, 1),
+        'carga_admissivel': round(admissible, 1),
+    }
+
+def parse_pile_options(options):
+    # Validate {"tipos": [...], "diametros": [...], "profundidades": [...],
+    # "metodos": [...]}; missing keys use every type/method and the default
+    # diameters and tip depths
+    if not isinstance(options, dict):
+        raise ValueError("Parâmetros de estacas inválidos")
+    pile_types = options.get('tipos') or list(PILE_TYPES)
+    unknown = [t for t in pile_types if t not in PILE_TYPES]
+    if unknown:
+        raise ValueError(f"Tipo de estaca desconhecido: {', '.join(map(str, unknown))}")
+    methods = options.get('metodos') or list(METHODS)
+    unknown = [m for m in methods if m not in METHODS]
+    if unknown:
+        raise ValueError(f"Método desconhecido: {', '.join(map(str, unknown))}")
+    try:
+        diameters = [float(str(d).replace(',', '.')) for d in options.get('diametros') or DEFAULT_DIAMETERS]
+        tip_depths = options.get('profundidades')
+        tip_depths = [int(float(str(d).replace(',', '.'))) for d in tip_depths] if tip_depths else None
+    except ValueError:
+        raise ValueError("Diâmetros e profundidades das estacas devem ser números")
+    if any(not (0 < d <= 3) for d in diameters):
+        raise ValueError("Diâmetro de estaca fora do intervalo (0 a 3 m)")
+    return {'tipos': pile_types, 'diametros': diameters, 'profundidades': tip_depths, 'metodos': methods}
+
+def pile_capacity(profile, options):
+    return capacity_grid(profile, options['tipos'], options['diametros'],
+                         options['profundidades'], options['metodos'])
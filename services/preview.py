@@ -0,0 +1,54 @@
+import json
+import hashlib
+from flask import render_template
+
+PREVIEW_TEMPLATE = 'components/preview.html'
+
+# Sections of the preview, each rendered from its own partial
+PREVIEW_SECTIONS = (
+    ('general', 'components/preview/general.html'),
+    ('soil_layers', 'components/preview/soil_layers.html'),
+    ('spt_data', 'components/preview/spt_data.html'),
+    ('observations', 'components/preview/observations.html'),
+)
+
+# Form fields shown in the general information table
+GENERAL_FIELDS = ('laudo_numero', 'spt_numero', 'obra', 'cota', 'local', 'cliente',
+                  'designer', 'surveyor', 'date', 'fl_numero')
+
+def section_context(name, form_data, soil_layers, spt_data):
+    # Only the inputs a section displays, so an edit elsewhere keeps its hash.
+    # Missing form keys stay missing because the templates have defaults.
+    if name == 'general':
+        return {'form_data': {k: form_data[k] for k in GENERAL_FIELDS if k in form_data}}
+    if name == 'soil_layers':
+        return {'soil_layers': soil_layers}
+    if name == 'spt_data':
+        return {'spt_data': spt_data}
+    return {'form_data': {k: form_data[k] for k in ('observacoes',) if k in form_data}}
+
+def section_hash(name, context):
+    payload = json.dumps([name, context], sort_keys=True, separators=(',', ':'),
+                         ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def preview_sections(form_data, soil_layers, spt_data):
+    # [(name, template, context, hash)] in display order
+    sections = []
+    for name, template in PREVIEW_SECTIONS:
+        context = section_context(name, form_data, soil_layers, spt_data)
+        sections.append((name, template, context, section_hash(name, context)))
+    return sections
+
+def render_changed_sections(sections, known_hashes):
+    # Render only the sections whose hash differs from the client's copy
+    return {
+        name: {'hash': digest, 'html': render_template(template, **context)}
+        for name, template, context, digest in sections
+        if known_hashes.get(name) != digest
+    }
+
+def warm_templates(app):
+    # Compile the preview templates once at startup; Jinja keeps them cached
+    for name in (PREVIEW_TEMPLATE,) + tuple(template for _, template in PREVIEW_SECTIONS):
+        app.jinja_env.get_template(name)
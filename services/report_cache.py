@@ -0,0 +1,53 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+def payload_key(form_data, profile):
+    # Hash of the normalized payload; key order and whitespace do not matter
+    payload = json.dumps([form_data, profile.to_payload()], sort_keys=True,
+                         separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ReportCache:
+    # Bounded LRU cache of rendered PDFs, shared by all request threads
+    def __init__(self, max_entries=128, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, filename, pdf_bytes):
+        # Entries larger than the whole budget are never cached
+        if len(pdf_bytes) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old[1])
+            self.entries[key] = (filename, pdf_bytes)
+            self.total_bytes += len(pdf_bytes)
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+# Process-wide cache used by the Flask routes
+report_cache = ReportCache()
@@ -0,0 +1,53 @@
+import math
+from models.borehole import BoreholeProfile
+from services.pile_capacity import parse_pile_options
+from services.output_profiles import parse_output_profile
+
+# Fixed vertical scale limits: the form asks for at least 1 m per sheet, and
+# a paginated laudo is capped so one request cannot ask for endless sheets
+MIN_METRES_PER_PAGE = 1
+MAX_SHEETS = 100
+
+def prepare_report_data(data):
+    # Pull the sections out of a request payload and validate them into a
+    # BoreholeProfile; raises ValueError on bad input
+    form_data = data.get('formData', {}) or {}
+    soil_layers = data.get('soilLayers', []) or []
+    spt_data = data.get('sptData', []) or []
+    
+    profile = BoreholeProfile.from_payload(soil_layers, spt_data)
+    
+    # Optional fixed vertical scale (metres per sheet) for paginated reports
+    metres_per_page = form_data.get('metros_por_folha') or 0
+    try:
+        number = float(metres_per_page)
+    except (TypeError, ValueError):
+        number = math.nan
+    if not math.isfinite(number):
+        raise ValueError(f"Metros por folha inválido ({metres_per_page!r})")
+    metres_per_page = number
+    if metres_per_page <= 0:
+        metres_per_page = None
+    elif metres_per_page < MIN_METRES_PER_PAGE:
+        raise ValueError(f"Metros por folha deve ser de pelo menos {MIN_METRES_PER_PAGE} m")
+    else:
+        max_depth = max(profile.max_layer_depth, profile.max_sample_depth)
+        if math.ceil(max_depth / metres_per_page) > MAX_SHEETS:
+            raise ValueError(f"O laudo ficaria com mais de {MAX_SHEETS} folhas; aumente os metros por folha")
+    form_data['metros_por_folha'] = metres_per_page
+    
+    # Optional pile capacity table appended to the laudo: "1" from the form
+    # uses the default grid, a dict chooses types/diameters/depths
+    piles = form_data.get('capacidade_estacas')
+    if isinstance(piles, dict):
+        form_data['capacidade_estacas'] = parse_pile_options(piles)
+    elif piles in (True, '1', 'true', 'sim'):
+        form_data['capacidade_estacas'] = parse_pile_options({})
+    else:
+        form_data['capacidade_estacas'] = None
+
+    # Output profile (archive or mobile) and optional grayscale rendering
+    form_data['perfil_saida'] = parse_output_profile(form_data.get('perfil_saida'))
+    form_data['escala_cinza'] = form_data.get('escala_cinza') in (True, '1', 'true', 'sim')
+
+    return form_data, profile
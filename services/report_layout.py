@@ -0,0 +1,233 @@
+import math
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from reportlab.lib.units import mm
+from services.text_layout import fit_text
+
+# Depth used for the vertical scale when the borehole has no data
+DEFAULT_MAX_DEPTH = 15
+
+# Blow counts covered by the chart width
+MAX_BLOWS = 50
+
+# Font of the layer descriptions (CLASSIFICAÇÃO column)
+DESCRIPTION_FONT = 'Helvetica'
+DESCRIPTION_SIZE = 7
+
+@lru_cache(maxsize=None)
+def page_geometry(width, height):
+    # Positions shared by the static frame and the data layers
+    x_start = 15*mm
+    y_content_start = height - 20*mm  # Adjusted from 50*mm to 20*mm
+    content_height = 190*mm  # Increased height since header is removed
+    content_width = width - 30*mm
+
+    # Column widths based on the example
+    col1_width = content_width * 0.35  # CAMADAS DETECTADAS (left)
+    col2_width = content_width * 0.10  # ESCALA DAS COTAS
+    col3_width = content_width * 0.05  # AMOSTRA REVESTIDA
+    col4_width = content_width * 0.50  # CAMADAS DETECTADAS (right with SPT chart)
+
+    y_subheader2 = y_content_start - 12*mm
+    y_content_start_actual = y_subheader2 - 8*mm
+
+    # Space for observations at the bottom of the content area
+    obs_height = 25*mm
+    adjusted_content_height = content_height - obs_height
+
+    return {
+        'x_start': x_start,
+        'y_content_start': y_content_start,
+        'content_height': content_height,
+        'content_width': content_width,
+        'col1_width': col1_width,
+        'col2_width': col2_width,
+        'col3_width': col3_width,
+        'col4_width': col4_width,
+        'y_subheader2': y_subheader2,
+        'y_data': y_content_start_actual,
+        'data_height': adjusted_content_height - (y_content_start - y_content_start_actual),
+        'obs_height': obs_height,
+        'y_obs': y_content_start - content_height + obs_height,
+        'footer_y': 30*mm,
+        'table_x': 15*mm,
+        'table_width': width - 30*mm,
+        'table_height': 25*mm,
+    }
+
+class PageLayout:
+    # Coordinates and strings for the variable layers of one sheet; the
+    # draw_* functions only emit what is stored here
+    def __init__(self, number, total, top_depth, bottom_depth, scale):
+        self.number = number
+        self.total = total
+        self.top_depth = top_depth
+        self.bottom_depth = bottom_depth
+        self.scale = scale
+        self.layer_labels = []       # (x, y, text) start depth of each layer
+        self.description_lines = []  # (x, y, text, font_size)
+        self.water = None            # (x1, x2, y, label_x, label_y, text)
+        self.depth_ticks = []        # (x1, x2, y, label_x, label_y, text)
+        self.initial_points = []     # vertices of the INICIAL curve
+        self.final_points = []       # vertices of the FINAL curve
+        self.initial_markers = []    # (x, y, blows) samples shown on this sheet
+        self.final_markers = []
+        self.clip = None             # (x, y, width, height) for curves crossing a page break
+        self.observations = []       # (x, y, text)
+        self.sheet_label = None      # (x, y, text)
+
+class ReportLayout:
+    # Single pass over the profile that computes scales, positions, the water
+    # level and wrapped text for every sheet. Pages are produced lazily so a
+    # deep borehole never has more than one sheet of layout in memory.
+    def __init__(self, width, height, form_data, profile, metres_per_page=None):
+        self.width = width
+        self.height = height
+        self.profile = profile
+        self.geometry = g = page_geometry(width, height)
+        self.metres_per_page = metres_per_page
+
+        # One vertical scale shared by the layers, the depth scale and the chart
+        self.max_depth = max(profile.max_layer_depth, profile.max_sample_depth) or DEFAULT_MAX_DEPTH
+        if metres_per_page:
+            self.num_pages = max(1, math.ceil(self.max_depth / metres_per_page))
+        else:
+            self.num_pages = 1
+
+        self.water_depth = profile.water_level_depth
+
+        # Column positions
+        self.layers_x = g['x_start']
+        self.layers_width = g['col1_width']
+        self.scale_x = g['x_start'] + g['col1_width']
+        self.scale_width = g['col2_width']
+        self.chart_x = self.scale_x + g['col2_width'] + g['col3_width']
+        self.chart_width = g['col4_width']
+        self.h_scale = self.chart_width / MAX_BLOWS
+
+        # Descriptions start after the depth label and keep clear of the column border
+        self.description_x = self.layers_x + 10*mm
+        self.description_width = self.layers_width - 12*mm
+
+        self.observations = self.observation_lines(profile)
+        self.footer_texts = self.footer_lines(form_data)
+
+    def observation_lines(self, profile):
+        # Calculate limite de sondagem and profundidade atingida from soil layers
+        max_depth = profile.max_layer_depth
+        g = self.geometry
+        x = g['x_start'] + 5*mm
+        y = g['y_obs']
+
+        # Standard observations
+        observations = [
+            f"- Limite de sondagem ao S.P.T.: {max_depth}m",
+            f"- Profundidade atingida: {max_depth}m"
+        ]
+
+        # Add water level observation if present
+        if self.water_depth is not None:
+            observations.append(f"- Água com {self.water_depth}m de profundidade")
+
+        return [(x, y - 10*mm - i*5*mm, obs) for i, obs in enumerate(observations)]
+
+    def footer_lines(self, form_data):
+        g = self.geometry
+        table_height = g['table_height']
+        table_x = g['table_x']
+        table_y = g['footer_y']
+        col_width = g['table_width'] / 3
+        return [
+            (table_x + col_width + 5*mm, table_y + table_height - 10*mm, form_data.get('empresa', '')),
+            (table_x + col_width + 5*mm, table_y + table_height - 20*mm, form_data.get('endereco_empresa', '')),
+            (table_x + 2*col_width + 5*mm, table_y + table_height - 10*mm, form_data.get('responsavel_tecnico', '')),
+            (table_x + 2*col_width + 5*mm, table_y + table_height - 20*mm, form_data.get('crea', '')),
+        ]
+
+    @property
+    def paginated(self):
+        return bool(self.metres_per_page)
+
+    def pages(self):
+        for number in range(self.num_pages):
+            yield self.page(number)
+
+    def page(self, number):
+        profile = self.profile
+        g = self.geometry
+        y = g['y_data']
+        height = g['data_height']
+
+        if self.paginated:
+            top_depth = number * self.metres_per_page
+            bottom_depth = top_depth + self.metres_per_page
+        else:
+            top_depth = 0
+            bottom_depth = self.max_depth
+        scale = height / (bottom_depth - top_depth)
+        page = PageLayout(number + 1, self.num_pages, top_depth, bottom_depth, scale)
+
+        # Soil layers crossing this sheet; a layer continued from the previous
+        # sheet starts at the top of this one and has no depth marker
+        first = bisect_right(profile.layer_ends, top_depth) if self.paginated else 0
+        last = bisect_left(profile.layer_starts, bottom_depth) if self.paginated else profile.layer_count
+        for i in range(first, last):
+            start_depth = profile.layer_starts[i]
+            y_start = y - (max(start_depth, top_depth) - top_depth) * scale
+            y_end = y - (min(profile.layer_ends[i], bottom_depth) - top_depth) * scale
+            if start_depth >= top_depth:
+                page.layer_labels.append((self.layers_x + 2*mm, y_start - 3*mm, f"{start_depth:.2f}"))
+
+            # Wrap by font metrics and keep the text inside the layer's band,
+            # shrinking or truncating it when the layer is thin
+            size, leading, lines = fit_text(profile.descriptions[i], DESCRIPTION_FONT, DESCRIPTION_SIZE,
+                                            self.description_width, round(y_start - y_end - 3*mm, 1))
+            for j, line in enumerate(lines):
+                page.description_lines.append((self.description_x, y_start - 3*mm - j*leading, line, size))
+
+        # Water level line across the layers column
+        if self.water_depth is not None and top_depth <= self.water_depth <= bottom_depth:
+            water_y = y - (self.water_depth - top_depth) * scale
+            page.water = (self.layers_x, self.layers_x + self.layers_width, water_y,
+                          self.layers_x + 2*mm, water_y - 3*mm, f"ÁGUA {self.water_depth:.2f}m")
+
+        # Depth markers every meter
+        for depth in range(math.ceil(top_depth), int(bottom_depth) + 1):
+            y_pos = y - (depth - top_depth) * scale
+            page.depth_ticks.append((self.scale_x, self.scale_x + self.scale_width, y_pos,
+                                     self.scale_x + self.scale_width/2, y_pos - 3*mm, str(depth)))
+
+        # SPT curves. On a paginated sheet one sample on each side of the window
+        # is kept so the curves continue across the page break, clipped to the chart
+        if self.paginated:
+            first = max(0, bisect_left(profile.depths, top_depth) - 1)
+            last = min(profile.sample_count, bisect_right(profile.depths, bottom_depth) + 1)
+            page.clip = (self.chart_x, y - height, self.chart_width, height)
+        else:
+            first, last = 0, profile.sample_count
+
+        for i in range(first, last):
+            depth = profile.depths[i]
+            initial = profile.golpes_inicial[i]
+            final = profile.golpes_final[i]
+            y_pos = y - (depth - top_depth) * scale
+            x_initial = self.chart_x + initial * self.h_scale
+            x_final = self.chart_x + final * self.h_scale
+            page.initial_points.append((x_initial, y_pos))
+            page.final_points.append((x_final, y_pos))
+
+            # Markers only for samples on this sheet; a sample on a page break
+            # belongs to the sheet above it
+            if depth > bottom_depth or depth < top_depth or (self.paginated and 0 < top_depth == depth):
+                continue
+            page.initial_markers.append((x_initial, y_pos, initial))
+            page.final_markers.append((x_final, y_pos, final))
+
+        # Observations summarize the whole borehole, so they go on the last sheet
+        if number == self.num_pages - 1:
+            page.observations = self.observations
+
+        if self.paginated:
+            page.sheet_label = (g['table_x'] + 2*mm, g['footer_y'] + 1.5*mm,
+                                f"FOLHA {number + 1:02d}/{self.num_pages:02d}")
+        return page
@@ -0,0 +1,158 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+# Page size of the listing API
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    laudo_numero TEXT COLLATE NOCASE NOT NULL DEFAULT '',
+    obra TEXT COLLATE NOCASE NOT NULL DEFAULT '',
+    cliente TEXT COLLATE NOCASE NOT NULL DEFAULT '',
+    spt_numero TEXT NOT NULL DEFAULT '',
+    report_date TEXT NOT NULL DEFAULT '',
+    payload_hash TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_laudo_numero ON reports (laudo_numero);
+CREATE INDEX IF NOT EXISTS reports_obra ON reports (obra);
+CREATE INDEX IF NOT EXISTS reports_cliente ON reports (cliente);
+CREATE INDEX IF NOT EXISTS reports_report_date ON reports (report_date);
+CREATE INDEX IF NOT EXISTS reports_updated_at ON reports (updated_at, id);
+"""
+
+# Columns returned by the listing (the payload is only read for a single report)
+SUMMARY_COLUMNS = "id, laudo_numero, obra, cliente, spt_numero, report_date, created_at, updated_at"
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def row_to_dict(row):
+    return {key: row[key] for key in row.keys()}
+
+class ReportRepository:
+    # SQLite store of laudo payloads. Each thread keeps its own connection
+    # (sqlite3 connections must not be shared across threads); WAL lets
+    # readers run while a request is writing.
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.schema_lock = threading.Lock()
+        self.schema_ready = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            if not self.schema_ready:
+                with self.schema_lock:
+                    if not self.schema_ready:
+                        conn.executescript(SCHEMA)
+                        self.schema_ready = True
+        return conn
+
+    def save(self, form_data, payload, payload_hash):
+        # Insert the report; an identical payload updates the existing row
+        # instead of duplicating it. Returns (id, created).
+        now = datetime.now().isoformat(timespec='seconds')
+        conn = self.connection()
+        with conn:
+            row = conn.execute("SELECT id FROM reports WHERE payload_hash = ?", (payload_hash,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE reports SET updated_at = ? WHERE id = ?", (now, row['id']))
+                return row['id'], False
+            cursor = conn.execute(
+                "INSERT INTO reports (laudo_numero, obra, cliente, spt_numero, report_date,"
+                " payload_hash, payload, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(form_data.get('laudo_numero') or ''),
+                    str(form_data.get('obra') or ''),
+                    str(form_data.get('cliente') or ''),
+                    str(form_data.get('spt_numero') or ''),
+                    str(form_data.get('date') or ''),
+                    payload_hash,
+                    json.dumps(payload, ensure_ascii=False, separators=(',', ':')),
+                    now,
+                    now,
+                ),
+            )
+            return cursor.lastrowid, True
+
+    def get(self, report_id):
+        row = self.connection().execute(
+            f"SELECT {SUMMARY_COLUMNS}, payload FROM reports WHERE id = ?", (report_id,)).fetchone()
+        if row is None:
+            return None
+        report = row_to_dict(row)
+        report['payload'] = json.loads(report['payload'])
+        return report
+
+    def delete(self, report_id):
+        conn = self.connection()
+        with conn:
+            return conn.execute("DELETE FROM reports WHERE id = ?", (report_id,)).rowcount > 0
+
+    def search(self, q=None, laudo_numero=None, obra=None, cliente=None,
+               date_from=None, date_to=None, page=1, per_page=DEFAULT_PER_PAGE):
+        # Prefix matches (case-insensitive) so the NOCASE indexes are used;
+        # newest first. Returns (reports, total).
+        where = []
+        params = []
+        for column, value in (('laudo_numero', laudo_numero), ('obra', obra), ('cliente', cliente)):
+            if value:
+                where.append(f"{column} LIKE ? ESCAPE '\\'")
+                params.append(escape_like(value) + '%')
+        if q:
+            pattern = escape_like(q) + '%'
+            where.append("(laudo_numero LIKE ? ESCAPE '\\' OR obra LIKE ? ESCAPE '\\' OR cliente LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern, pattern])
+        if date_from:
+            where.append("report_date >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("report_date <= ?")
+            params.append(date_to)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        per_page = max(1, min(int(per_page), MAX_PER_PAGE))
+        page = max(1, int(page))
+        conn = self.connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM reports{clause}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM reports{clause} ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page],
+        ).fetchall()
+        return [row_to_dict(row) for row in rows], total
+
+    def close(self):
+        # Close the calling thread's connection
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+def get_report_repository(path):
+    # One repository (and one set of per-thread connections) per database file
+    with _repositories_lock:
+        repository = _repositories.get(path)
+        if repository is None:
+            repository = _repositories[path] = ReportRepository(path)
+        return repository
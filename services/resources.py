@@ -0,0 +1,116 @@
+import io
+import os
+import time
+import threading
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+
+# Standard fonts used by the report; their metrics are parsed on first use
+BASE_FONTS = ('Helvetica', 'Helvetica-Bold')
+
+# Largest size the logo is printed at (laudo footer), used to downsample it
+LOGO_BOX_MM = (25, 15)
+
+# Seconds between checks for changed files on disk
+CHECK_INTERVAL = 2.0
+
+def logo_path(root_path):
+    return os.path.join(root_path, 'static', 'img', 'company_logo.png')
+
+def file_signature(path):
+    # (mtime, size) of a file; None if missing
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def load_image(path):
+    # Decode once; the canvas reuses the pixel data for every report
+    try:
+        image = ImageReader(path)
+        image.getRGBData()
+        return image
+    except Exception:
+        # A broken logo should not stop reports from being generated
+        return None
+
+def load_logo_variant(path, dpi=None, grayscale=False):
+    # Logo flattened on white, optionally converted to gray and, with a dpi,
+    # shrunk to that resolution at its printed size and re-encoded as a JPEG
+    # (embedded in the PDF as is instead of as raw pixels)
+    try:
+        with Image.open(path) as source:
+            source.load()
+            if source.mode in ('RGBA', 'LA', 'P'):
+                source = source.convert('RGBA')
+                image = Image.new('RGB', source.size, 'white')
+                image.paste(source, mask=source.getchannel('A'))
+            else:
+                image = source.convert('RGB')
+        if grayscale:
+            image = image.convert('L')
+        if dpi:
+            box = tuple(max(1, round(size / 25.4 * dpi)) for size in LOGO_BOX_MM)
+            image.thumbnail(box, Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=80, optimize=True)
+            buffer.seek(0)
+            image = buffer
+        reader = ImageReader(image)
+        reader.getRGBData()
+        return reader
+    except Exception:
+        return None
+
+class ResourceRegistry:
+    # Process-wide cache of the decoded logo and its reduced copies. Files are checked for changes at most every CHECK_INTERVAL
+    # seconds and reloaded under a lock; readers never block on a fresh entry.
+    def __init__(self, check_interval=CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self.entries = {}  # path or key -> (signature, value, checked_at)
+        self.lock = threading.Lock()
+
+    def file_resource(self, path, loader, key=None):
+        # key tells apart several values loaded from the same file
+        key = key or path
+        now = time.monotonic()
+        entry = self.entries.get(key)
+        if entry is not None and now - entry[2] < self.check_interval:
+            return entry[1]
+
+        with self.lock:
+            # Another thread may have refreshed it while we waited
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[2] < self.check_interval:
+                return entry[1]
+            signature = file_signature(path)
+            if entry is not None and entry[0] == signature:
+                value = entry[1]
+            else:
+                value = loader(path) if signature else None
+            self.entries[key] = (signature, value, now)
+            return value
+
+    def logo(self, root_path, dpi=None, grayscale=False):
+        # ImageReader for static/img/company_logo.png, or None without a logo;
+        # dpi/grayscale select a reduced copy for the output profiles
+        path = logo_path(root_path)
+        if not dpi and not grayscale:
+            return self.file_resource(path, load_image)
+        return self.file_resource(path, lambda p: load_logo_variant(p, dpi, grayscale),
+                                  key=(path, dpi, grayscale))
+
+    def load(self, root_path):
+        # Warm everything up front so the first report pays nothing extra
+        for name in BASE_FONTS:
+            pdfmetrics.getFont(name)
+        self.logo(root_path)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+# Shared by all request threads and job workers of the process
+resources = ResourceRegistry()
@@ -0,0 +1,69 @@
+from functools import lru_cache
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# Line spacing relative to the font size (4mm at 7pt, as the report always used)
+LEADING = 1.62
+
+# Part of the font size below the baseline
+DESCENT = 0.25
+
+# Smallest size a description is shrunk to before it gets truncated
+MIN_FONT_SIZE = 5
+
+ELLIPSIS = '…'
+
+@lru_cache(maxsize=8192)
+def wrap_text(text, font_name, font_size, max_width):
+    # Greedy word wrap by real glyph widths. Words wider than the line are
+    # broken between characters. Returns a tuple so results can be shared.
+    lines = []
+    current = ''
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if stringWidth(candidate, font_name, font_size) <= max_width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        current = ''
+        while stringWidth(word, font_name, font_size) > max_width and len(word) > 1:
+            cut = len(word) - 1
+            while cut > 1 and stringWidth(word[:cut], font_name, font_size) > max_width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        current = word
+    if current:
+        lines.append(current)
+    return tuple(lines)
+
+def truncate_line(text, font_name, font_size, max_width):
+    # Cut the line so that it fits with a trailing ellipsis
+    text = text.rstrip()
+    while text and stringWidth(text + ELLIPSIS, font_name, font_size) > max_width:
+        text = text[:-1].rstrip()
+    return text + ELLIPSIS
+
+def max_lines(font_size, max_height):
+    # Lines whose baselines fit in max_height below the first one
+    return 1 + max(0, int((max_height - font_size * DESCENT) // (font_size * LEADING)))
+
+@lru_cache(maxsize=8192)
+def fit_text(text, font_name, font_size, max_width, max_height, min_size=MIN_FONT_SIZE):
+    # Wrap text into a max_width x max_height box (max_height measured from the
+    # first baseline down). The font shrinks in half points down to min_size;
+    # if it still does not fit, the last line is truncated with an ellipsis.
+    # Returns (font_size, leading, lines).
+    size = font_size
+    while True:
+        lines = wrap_text(text, font_name, size, max_width)
+        available = max_lines(size, max_height)
+        if len(lines) <= available:
+            return size, size * LEADING, lines
+        if size - 0.5 < min_size:
+            break
+        size -= 0.5
+
+    lines = lines[:available]
+    lines = lines[:-1] + (truncate_line(lines[-1], font_name, size, max_width),)
+    return size, size * LEADING, lines
@@ -0,0 +1,74 @@
+from services.report_cache import ReportCache, payload_key, report_cache
+from services.pdf_generator import render_spt_report, report_filename
+from services.metrics import metrics
+
+# Output formats of the thumbnail endpoint
+THUMBNAIL_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+DEFAULT_DPI = 72
+MIN_DPI = 36
+MAX_DPI = 200
+
+class ThumbnailUnavailable(Exception):
+    pass
+
+# Rendered images by payload hash, page, format and DPI
+thumbnail_cache = ReportCache(max_entries=256, max_bytes=32 * 1024 * 1024)
+
+def load_pymupdf():
+    # PyMuPDF is optional; only the thumbnail endpoint needs it
+    try:
+        import pymupdf
+    except ImportError:
+        try:
+            import fitz as pymupdf
+        except ImportError:
+            raise ThumbnailUnavailable("Miniaturas requerem o pacote PyMuPDF (pip install pymupdf)")
+    return pymupdf
+
+def report_pdf(key, form_data, profile, root_path=None):
+    # PDF bytes of the report, shared with /api/render-pdf through the report cache
+    cached = report_cache.get(key)
+    if cached is not None:
+        return cached[1]
+    pdf_bytes = render_spt_report(form_data, profile, root_path)
+    report_cache.put(key, report_filename(form_data), pdf_bytes)
+    return pdf_bytes
+
+def rasterize(pdf_bytes, page_number, output, dpi):
+    # Draw one page of the real PDF output as PNG or SVG
+    pymupdf = load_pymupdf()
+    document = pymupdf.open(stream=pdf_bytes, filetype='pdf')
+    try:
+        if not 1 <= page_number <= document.page_count:
+            raise ValueError(f"Folha {page_number} não existe (o laudo tem {document.page_count})")
+        page = document[page_number - 1]
+        zoom = dpi / 72
+        if output == 'svg':
+            return page.get_svg_image(matrix=pymupdf.Matrix(zoom, zoom), text_as_path=False).encode('utf-8')
+        return page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False).tobytes('png')
+    finally:
+        document.close()
+
+def render_thumbnail(form_data, profile, page_number=1, output='png', dpi=DEFAULT_DPI, root_path=None):
+    # Returns (image bytes, mimetype, cache key, hit)
+    if output not in THUMBNAIL_FORMATS:
+        raise ValueError(f"Formato inválido ({output!r}), use png ou svg")
+    if not MIN_DPI <= dpi <= MAX_DPI:
+        raise ValueError(f"DPI deve estar entre {MIN_DPI} e {MAX_DPI}")
+
+    report_key = payload_key(form_data, profile)
+    key = f"{report_key}:{page_number}:{output}:{dpi}"
+    cached = thumbnail_cache.get(key)
+    if cached is not None:
+        return cached[1], cached[0], key, True
+
+    pdf_bytes = report_pdf(report_key, form_data, profile, root_path)
+    with metrics.stage('thumbnail'):
+        image = rasterize(pdf_bytes, page_number, output, dpi)
+    mimetype = THUMBNAIL_FORMATS[output]
+    thumbnail_cache.put(key, mimetype, image)
+    return image, mimetype, key, False
@@ -274,19 +274,30 @@ document.addEventListener('DOMContentLoaded', function() {
         };
     }
     
+    // Content hash of each preview section currently on screen
+    let previewHashes = null;
+    
     // Generate preview
     function generatePreview() {
         const data = collectFormData();
         
-        // Show loading
-        previewContainer.innerHTML = `
-            <div class="text-center p-5">
-                <div class="spinner-border text-primary" role="status">
-                    <span class="visually-hidden">Carregando...</span>
+        // With the preview already on screen only changed sections are requested
+        const incremental = previewHashes && previewContainer.querySelector('.spt-report-preview');
+        if (incremental) {
+            data.sectionHashes = previewHashes;
+        } else {
+            previewHashes = null;
+            
+            // Show loading
+            previewContainer.innerHTML = `
+                <div class="text-center p-5">
+                    <div class="spinner-border text-primary" role="status">
+                        <span class="visually-hidden">Carregando...</span>
+                    </div>
+                    <p class="mt-3">Gerando visualização...</p>
                 </div>
-                <p class="mt-3">Gerando visualização...</p>
-            </div>
-        `;
+            `;
+        }
         
         // Send data to server
         fetch('/api/preview', {
@@ -296,10 +307,18 @@ document.addEventListener('DOMContentLoaded', function() {
             },
             body: JSON.stringify(data)
         })
-        .then(response => response.json())
+        .then(response => response.status === 304 ? {success: true, sections: {}} : response.json())
         .then(result => {
-            if (result.success) {
+            if (result.success && result.html !== undefined) {
                 previewContainer.innerHTML = result.html;
+                previewHashes = result.hashes;
+            } else if (result.success) {
+                // Patch the changed sections in place
+                Object.entries(result.sections).forEach(([name, section]) => {
+                    const element = previewContainer.querySelector(`[data-section="${name}"]`);
+                    if (element) element.innerHTML = section.html;
+                });
+                if (result.hashes) previewHashes = result.hashes;
             } else {
                 previewContainer.innerHTML = `
                     <div class="alert alert-danger" role="alert">
@@ -317,6 +336,9 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Object URL of the last generated PDF
+    let currentPdfUrl = null;
+    
     // Generate PDF
     function generatePdf() {
         const data = collectFormData();
@@ -331,38 +353,47 @@ document.addEventListener('DOMContentLoaded', function() {
             </div>
         `;
         
-        // Send data to server
-        fetch('/api/generate-pdf', {
+        // Send data to server; the PDF comes back in the same response
+        fetch('/api/render-pdf', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify(data)
         })
-        .then(response => response.json())
-        .then(result => {
-            if (result.success) {
-                // Show success message and download link
-                previewContainer.innerHTML = `
-                    <div class="alert alert-success" role="alert">
-                        PDF gerado com sucesso!
-                    </div>
-                    <div class="text-center mb-3">
-                        <a href="/download-pdf/${result.pdfPath}" class="btn btn-primary" download>
-                            <i class="bi bi-download"></i> Baixar PDF
-                        </a>
-                    </div>
-                    <div class="pdf-preview">
-                        <iframe src="/download-pdf/${result.pdfPath}" width="100%" height="800" style="border: 1px solid #ddd;"></iframe>
-                    </div>
-                `;
-            } else {
-                previewContainer.innerHTML = `
-                    <div class="alert alert-danger" role="alert">
-                        Erro ao gerar PDF: ${result.error || 'Erro desconhecido'}
-                    </div>
-                `;
+        .then(response => {
+            if (!response.ok) {
+                return response.json().then(result => {
+                    throw new Error(result.error || 'Erro desconhecido');
+                });
             }
+            
+            const disposition = response.headers.get('Content-Disposition') || '';
+            const match = disposition.match(/filename="?([^";]+)"?/);
+            const filename = match ? match[1] : 'Laudo_SPT.pdf';
+            return response.blob().then(blob => ({ blob, filename }));
+        })
+        .then(({ blob, filename }) => {
+            // Release the previous PDF before showing the new one
+            if (currentPdfUrl) {
+                URL.revokeObjectURL(currentPdfUrl);
+            }
+            currentPdfUrl = URL.createObjectURL(blob);
+            
+            // Show success message and download link
+            previewContainer.innerHTML = `
+                <div class="alert alert-success" role="alert">
+                    PDF gerado com sucesso!
+                </div>
+                <div class="text-center mb-3">
+                    <a href="${currentPdfUrl}" class="btn btn-primary" download="${filename}">
+                        <i class="bi bi-download"></i> Baixar PDF
+                    </a>
+                </div>
+                <div class="pdf-preview">
+                    <iframe src="${currentPdfUrl}" width="100%" height="800" style="border: 1px solid #ddd;"></iframe>
+                </div>
+            `;
         })
         .catch(error => {
             previewContainer.innerHTML = `
@@ -0,0 +1,52 @@
+import os
+import re
+import sys
+import zlib
+import base64
+
+# Import the app and services from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+def make_payload(samples=10, **form_data):
+    # Borehole with one layer and one SPT sample per metre
+    descriptions = ("Argila siltosa, mole, marrom", "Areia fina, compacta, cinza", "Silte arenoso, rijo, variegado")
+    soil_layers = []
+    spt_data = []
+    for i in range(samples):
+        soil_layers.append({'start_depth': str(i), 'end_depth': str(i + 1), 'description': descriptions[i % 3]})
+        spt_data.append({
+            'depth': str(i + 1),
+            'cota': '',
+            'amostra': '',
+            'golpes_inicial': str((i * 3) % 40),
+            'golpes_final': str((i * 5) % 45),
+            'has_water_level': i == samples // 3,
+        })
+    form = {'laudo_numero': 'TESTE', 'spt_numero': '1', 'obra': 'Obra', 'cliente': 'Cliente', 'empresa': 'Empresa'}
+    form.update(form_data)
+    return {'formData': form, 'soilLayers': soil_layers, 'sptData': spt_data}
+
+def decode_stream(dictionary, data):
+    if b'/ASCII85Decode' in dictionary:
+        data = data.strip()
+        data = base64.a85decode(data[:-2] if data.endswith(b'~>') else data)
+    if b'/FlateDecode' in dictionary:
+        data = zlib.decompress(data)
+    return data
+
+def page_streams(pdf_bytes):
+    # Content streams of the pages, leaving out form XObjects (the frame)
+    streams = []
+    for obj in re.split(rb'\n\d+ 0 obj\b', pdf_bytes)[1:]:
+        head, found, rest = obj.partition(b'stream\n')
+        if not found or b'/Subtype /Form' in head:
+            continue
+        streams.append(decode_stream(head, rest[:rest.rindex(b'endstream')]))
+    return streams
+
+@pytest.fixture
+def root_path(tmp_path):
+    # Throwaway app root, so generated PDFs and the database stay out of the tree
+    return str(tmp_path)
@@ -0,0 +1,52 @@
+import os
+import pytest
+import app as app_module
+from conftest import make_payload
+
+@pytest.fixture
+def client(tmp_path):
+    app = app_module.create_app({'REPORTS_DB': os.path.join(str(tmp_path), 'reports.sqlite3')})
+    return app.test_client()
+
+def huge_blows_payload():
+    payload = make_payload(5)
+    payload['sptData'][0]['golpes_final'] = str(10 ** 12)
+    return payload
+
+@pytest.mark.parametrize('url', ['/api/pile-capacity', '/api/thumbnail', '/api/generate-pdf', '/api/pdf-jobs'])
+def test_out_of_range_blows_are_a_json_400(client, url):
+    response = client.post(url, json=huge_blows_payload())
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+def test_unexpected_errors_are_json(client, monkeypatch):
+    def broken(profile, options):
+        raise RuntimeError("falha inesperada")
+    monkeypatch.setattr(app_module, 'pile_capacity', broken)
+    response = client.post('/api/pile-capacity', json=make_payload(5))
+    assert response.status_code == 500
+    assert response.get_json() == {'success': False, 'error': 'falha inesperada'}
+
+@pytest.mark.parametrize('boreholes', [[], 'SP-01', ['x'], [{'formData': 'x'}]])
+def test_malformed_batches_are_a_json_400(client, boreholes):
+    response = client.post('/api/generate-pdf/batch', json={'boreholes': boreholes})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+def test_unexpected_batch_errors_are_json(client, monkeypatch):
+    import services.batch_generator
+    def broken(root_path, boreholes):
+        raise RuntimeError("falha inesperada")
+    monkeypatch.setattr(services.batch_generator, 'generate_batch', broken)
+    response = client.post('/api/generate-pdf/batch', json={'boreholes': [make_payload(5)]})
+    assert response.status_code == 500
+    assert response.get_json() == {'success': False, 'error': 'falha inesperada'}
+
+def test_unexpected_job_errors_are_json(client, monkeypatch):
+    from services.pdf_jobs import pdf_jobs
+    def broken(root_path, form_data, profile):
+        raise RuntimeError("falha inesperada")
+    monkeypatch.setattr(pdf_jobs, 'submit', broken)
+    response = client.post('/api/pdf-jobs', json=make_payload(5))
+    assert response.status_code == 500
+    assert response.get_json() == {'success': False, 'error': 'falha inesperada'}
@@ -0,0 +1,20 @@
+from reportlab.lib.pagesizes import A4
+from models.borehole import BoreholeProfile
+from services.report_layout import ReportLayout
+from conftest import make_payload
+
+def layer(start, end, description='Argila'):
+    return {'start_depth': start, 'end_depth': end, 'description': description}
+
+def test_layers_are_chained_and_sorted():
+    profile = BoreholeProfile.from_payload([layer('0', '2'), layer('9', '5'), layer('5', '8')], [])
+    assert list(profile.layer_starts) == [0.0, 2.0, 5.0]
+    assert list(profile.layer_ends) == [2.0, 5.0, 8.0]
+
+def test_every_layer_appears_on_a_sheet():
+    payload = make_payload(30)
+    profile = BoreholeProfile.from_payload(payload['soilLayers'], payload['sptData'])
+    width, height = A4
+    layout = ReportLayout(width, height, payload['formData'], profile, 7)
+    starts = [text for page in layout.pages() for _, _, text in page.layer_labels]
+    assert starts == [f"{start:.2f}" for start in profile.layer_starts]
@@ -0,0 +1,33 @@
+import io
+from services.bulk_import import group_boreholes, read_rows
+from services.report_data import prepare_report_data
+
+def import_csv(text):
+    rows = read_rows(io.BytesIO(text.encode('utf-8')), 'furos.csv')
+    return list(group_boreholes(rows))
+
+def test_sample_depths_come_from_the_spreadsheet():
+    # The first layer row has no blows, so samples and layers are not paired by position
+    boreholes = import_csv(
+        "furo;de;ate;descricao;profundidade;golpes_inicial;golpes_final\n"
+        "1;0;1;Aterro;;;\n"
+        "1;1;2;Argila mole;2;3;4\n"
+        "1;2;3;Areia fina;3;8;10\n"
+    )
+    assert len(boreholes) == 1
+    borehole = boreholes[0]
+    assert borehole['errors'] == []
+
+    _, profile = prepare_report_data(borehole['payload'])
+    assert list(profile.depths) == [2.0, 3.0]
+    assert list(profile.golpes_final) == [4, 10]
+    assert list(profile.layer_ends) == [1.0, 2.0, 3.0]
+
+def test_sample_without_depth_uses_its_layer_end():
+    boreholes = import_csv(
+        "furo,de,ate,descricao,golpes_inicial,golpes_final\n"
+        "7,0,1.5,Argila,2,3\n"
+        "7,1.5,2.5,Areia,5,6\n"
+    )
+    _, profile = prepare_report_data(boreholes[0]['payload'])
+    assert list(profile.depths) == [1.5, 2.5]
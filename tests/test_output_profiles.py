@@ -0,0 +1,71 @@
+import os
+import re
+import time
+import random
+import pytest
+from PIL import Image
+from services.output_profiles import OUTPUT_PROFILES
+from services.pdf_generator import render_spt_report
+from services.report_data import prepare_report_data
+from conftest import make_payload, page_streams
+
+# Generous ceiling for one 50-sample laudo, to catch a profile that gets
+# pathologically slow rather than to benchmark it
+MAX_RENDER_SECONDS = 2.0
+
+def render(root_path, **form_data):
+    form_data, profile = prepare_report_data(make_payload(50, **form_data))
+    start = time.perf_counter()
+    pdf_bytes = render_spt_report(form_data, profile, root_path)
+    return pdf_bytes, time.perf_counter() - start
+
+@pytest.fixture
+def logo_root(root_path):
+    # App root with a detailed 1200x720 logo, far above what the footer needs
+    rng = random.Random(0)
+    image = Image.new('RGB', (1200, 720))
+    image.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(1200 * 720)])
+    os.makedirs(os.path.join(root_path, 'static', 'img'))
+    image.save(os.path.join(root_path, 'static', 'img', 'company_logo.png'))
+    return root_path
+
+@pytest.mark.parametrize('output', list(OUTPUT_PROFILES))
+def test_profile_render_time(root_path, output):
+    pdf_bytes, elapsed = render(root_path, perfil_saida=output)
+    assert pdf_bytes.startswith(b'%PDF')
+    assert elapsed < MAX_RENDER_SECONDS
+
+@pytest.mark.parametrize('output', list(OUTPUT_PROFILES))
+def test_page_streams_are_compressed(root_path, output):
+    pdf_bytes, _ = render(root_path, perfil_saida=output)
+    assert b'/FlateDecode' in pdf_bytes
+    assert b'stream\nBT' not in pdf_bytes and b'stream\nq' not in pdf_bytes
+
+def test_mobile_strips_metadata(root_path):
+    archive, _ = render(root_path, perfil_saida='archive')
+    mobile, _ = render(root_path, perfil_saida='mobile')
+    assert b'/Title (Laudo SPT TESTE)' in archive
+    assert b'/Title ()' in mobile and b'/Producer ()' in mobile
+    assert len(mobile) < len(archive)
+
+def test_mobile_downsamples_the_logo(root_path, logo_root):
+    # Against the compressed archive output of the same payload and logo
+    archive, _ = render(logo_root, perfil_saida='archive')
+    mobile, _ = render(logo_root, perfil_saida='mobile')
+    mobile_gray, _ = render(logo_root, perfil_saida='mobile', escala_cinza='1')
+    without_logo, _ = render(os.path.join(root_path, 'sem_logo'), perfil_saida='mobile')
+    assert len(mobile) < len(archive) / 10
+    assert len(mobile_gray) <= len(mobile)
+    # The downsampled logo costs a few KB at most
+    assert len(mobile) - len(without_logo) < 20 * 1024
+
+def test_grayscale_has_no_colour(root_path):
+    pdf_bytes, _ = render(root_path, perfil_saida='archive', escala_cinza='1')
+    colours = [colour for stream in page_streams(pdf_bytes)
+               for colour in re.findall(rb'([\d.]+) ([\d.]+) ([\d.]+) (?:rg|RG)\b', stream)]
+    assert colours
+    assert all(r == g == b for r, g, b in colours)
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        prepare_report_data(make_payload(2, perfil_saida='impressora'))
@@ -0,0 +1,32 @@
+import re
+from services.pdf_generator import render_spt_report
+from services.report_data import prepare_report_data
+from conftest import make_payload, page_streams
+
+# Upper bounds for the reference borehole (8 samples, one sheet, no logo).
+# They sit a little above the current output; a change that goes back to one
+# operator per segment, marker or label blows well past them.
+MAX_PAGE_OPERATORS = 430
+MAX_PDF_BYTES = 6300
+
+STRING = re.compile(rb'\((?:\\.|[^\\)])*\)')
+OPERATOR = re.compile(rb"^[A-Za-z'\"][A-Za-z0-9*'\"]*$")
+
+def count_operators(content):
+    tokens = STRING.sub(b' ', content).split()
+    return sum(1 for token in tokens if OPERATOR.match(token))
+
+def reference_report(root_path):
+    # Rendered against an empty root, so no logo is embedded
+    form_data, profile = prepare_report_data(make_payload(8, perfil_saida='archive'))
+    return render_spt_report(form_data, profile, root_path)
+
+def test_page_operator_count(root_path):
+    streams = page_streams(reference_report(root_path))
+    assert len(streams) == 1
+    operators = count_operators(streams[0])
+    assert operators <= MAX_PAGE_OPERATORS
+
+def test_pdf_size(root_path):
+    pdf_bytes = reference_report(root_path)
+    assert len(pdf_bytes) <= MAX_PDF_BYTES
@@ -0,0 +1,34 @@
+import os
+import time
+from services.pdf_generator import generate_spt_report
+from services.pdf_store import PdfStore, get_pdf_store
+from services.report_data import prepare_report_data
+from conftest import make_payload
+
+def test_same_payload_is_stored_once(root_path):
+    form_data, profile = prepare_report_data(make_payload())
+    generate_spt_report(dict(form_data), profile, root_path=root_path, filename='Laudo_A.pdf')
+    generate_spt_report(dict(form_data), profile, root_path=root_path, filename='Laudo_B.pdf')
+
+    store = get_pdf_store(root_path)
+    first = os.stat(store.path('Laudo_A.pdf'))
+    second = os.stat(store.path('Laudo_B.pdf'))
+    assert first.st_ino == second.st_ino
+    assert first.st_nlink == 2
+
+def test_digest_identifies_the_content(tmp_path):
+    # Two renders of one payload never have the same bytes (creation date,
+    # document ID); the digest alone decides that they are the same laudo
+    store = PdfStore(str(tmp_path))
+    store.save('Laudo_A.pdf', b'%PDF render 1', digest='payload')
+    store.save('Laudo_B.pdf', b'%PDF render 2', digest='payload')
+    assert os.stat(store.path('Laudo_A.pdf')).st_ino == os.stat(store.path('Laudo_B.pdf')).st_ino
+
+def test_sweep_removes_old_then_least_recently_used(tmp_path):
+    store = PdfStore(str(tmp_path), max_bytes=250, max_age=3600)
+    now = time.time()
+    for name, age in (('velho.pdf', 7200), ('usado.pdf', 600), ('recente.pdf', 60), ('novo.pdf', 0)):
+        store.save(name, name.encode().ljust(100))
+        os.utime(store.path(name), (now - age, now - age))
+    assert store.sweep() == ['velho.pdf', 'usado.pdf']
+    assert sorted(os.listdir(str(tmp_path))) == ['novo.pdf', 'recente.pdf']
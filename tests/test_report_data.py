@@ -0,0 +1,19 @@
+import pytest
+from services.report_data import MAX_SHEETS, prepare_report_data
+from conftest import make_payload
+
+def test_metres_per_page_is_normalized():
+    form_data, _ = prepare_report_data(make_payload(30, metros_por_folha='10'))
+    assert form_data['metros_por_folha'] == 10.0
+    form_data, _ = prepare_report_data(make_payload(30, metros_por_folha=''))
+    assert form_data['metros_por_folha'] is None
+
+@pytest.mark.parametrize('value', ['1e-6', '0.5', 'nan', 'inf', 'dez'])
+def test_metres_per_page_rejects_bad_values(value):
+    with pytest.raises(ValueError):
+        prepare_report_data(make_payload(30, metros_por_folha=value))
+
+def test_sheet_count_is_capped():
+    with pytest.raises(ValueError):
+        prepare_report_data(make_payload(MAX_SHEETS + 1, metros_por_folha='1'))
+    prepare_report_data(make_payload(MAX_SHEETS, metros_por_folha='1'))